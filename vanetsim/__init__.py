@@ -0,0 +1,6 @@
+"""Headless VANET DDoS / BRSUM simulation library."""
+from .engine import Simulation
+from .fleet import VehicleStore
+from .model import LedgerRSU, LegitimateVehicle, MaliciousVehicle, RSU, Vehicle
+from .roads import RoadNetwork, load_road_network
+from .spatial import RSUGrid
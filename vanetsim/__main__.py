@@ -0,0 +1,155 @@
+"""Run a scenario headlessly: python -m vanetsim ddos --duration 10"""
+import argparse
+import os
+
+from .checkpoint import latest_checkpoint, restore_checkpoint
+from .detection import DETECTORS
+from .eventlog import LEVELS, EventLog
+from .queueing import POLICIES
+from .roads import DEFAULT_OSM_FILE, load_road_network
+from .scenarios import SCENARIOS
+
+# Options that shape the scenario when it is built; a resumed run takes them from its checkpoint
+SCENARIO_OPTIONS = ('dt', 'detector', 'block_size', 'block_interval', 'commit_latency', 'link_latency',
+                    'link_bandwidth', 'link_range', 'policy', 'service_rate', 'buffer_size', 'trace', 'geo',
+                    'attackers')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run a VANET scenario without a display.')
+    parser.add_argument('scenario', choices=sorted(SCENARIOS))
+    parser.add_argument('--osm', default=DEFAULT_OSM_FILE, help='OSM road network file')
+    parser.add_argument('--duration', type=float, default=10.0, help='Simulated seconds to run')
+    parser.add_argument('--dt', type=float, default=0.01, help='Simulated seconds per tick')
+    parser.add_argument('--log', help='Event log file (.txt for text, otherwise binary records)')
+    parser.add_argument('--log-level', choices=sorted(LEVELS), default='notice', help='Event log verbosity')
+    parser.add_argument('--detector', choices=sorted(DETECTORS), help='Attack detector of ledger RSUs (brsum, city)')
+    parser.add_argument('--block-size', type=int, help='Ledger transactions per block')
+    parser.add_argument('--block-interval', type=float, help='Seconds a ledger transaction may wait to be sealed')
+    parser.add_argument('--commit-latency', type=float, help='Seconds from sealing a ledger block to it taking effect')
+    parser.add_argument('--link-latency', type=float, help='Seconds per RSU-to-RSU gossip hop (city)')
+    parser.add_argument('--link-bandwidth', type=float, help='Bytes per second of each RSU-to-RSU link (city)')
+    parser.add_argument('--link-range', type=float, help='Metres within which RSUs are linked (city)')
+    parser.add_argument('--policy', choices=POLICIES,
+                        help='Model the RSU as a queue with this drop policy (baseline, ddos)')
+    parser.add_argument('--service-rate', type=float, help='Packets per second a queueing RSU serves')
+    parser.add_argument('--buffer-size', type=_positive, help='Packets a queueing RSU holds waiting')
+    parser.add_argument('--store', help='SQLite database persisting ledgers, revocations and packet counters')
+    parser.add_argument('--preload', help='Database of an earlier run whose revoked keys every ledger starts with')
+    parser.add_argument('--record-trajectory', metavar='DIR', help='Save the vehicle trajectories of the run')
+    parser.add_argument('--replay-trajectory', metavar='DIR', help='Move vehicles along a saved trajectory')
+    parser.add_argument('--trace', help='SUMO FCD trace (.xml or .csv, optionally .gz) the trace scenario streams')
+    parser.add_argument('--geo', action='store_true', help='The trace has lon/lat positions rather than metres')
+    parser.add_argument('--attackers', type=float, help='Fraction of trace vehicles that flood (trace)')
+    parser.add_argument('--metrics', metavar='PATH',
+                        help='Stream per-tick counters to PATH: a .csv file, otherwise a directory of .npz chunks')
+    parser.add_argument('--metrics-interval', type=int, default=1, metavar='TICKS', help='Ticks per metrics sample')
+    parser.add_argument('--checkpoint-dir', metavar='DIR', help='Save checkpoints of the run into DIR')
+    parser.add_argument('--checkpoint-interval', type=int, default=1000, metavar='TICKS',
+                        help='Ticks between checkpoints')
+    parser.add_argument('--resume', metavar='PATH',
+                        help='Continue from a checkpoint file, or the newest one in a directory, instead of building')
+    parser.add_argument('--profile', action='store_true', help='Time each phase of the main loop and print a summary')
+    parser.add_argument('--cprofile', type=_window, metavar='FIRST:LAST', help='Run cProfile over these ticks')
+    parser.add_argument('--tracemalloc', type=_window, metavar='FIRST:LAST', help='Trace allocations over these ticks')
+    parser.add_argument('--visual', action='store_true', help='Watch the run in a pygame window')
+    parser.add_argument('--fps', type=int, default=30, help='Display frame rate in visual mode')
+    parser.add_argument('--ticks-per-frame', type=int, help='Simulation ticks between rendered frames')
+    parser.add_argument('--speed', type=float, default=1.0, help='Simulated seconds per wall second in visual mode')
+    args = parser.parse_args(argv)
+
+    options = {'detector': args.detector} if args.detector else {}
+    ledger = {name: getattr(args, name) for name in ('block_size', 'block_interval', 'commit_latency')
+              if getattr(args, name) is not None}
+    if ledger:
+        options['ledger'] = ledger
+    gossip = {name: getattr(args, 'link_' + name) for name in ('latency', 'bandwidth')
+              if getattr(args, 'link_' + name) is not None}
+    if args.link_range is not None:
+        gossip['link_range'] = args.link_range
+    if gossip:
+        options['gossip'] = gossip
+    queue = {name: getattr(args, name) for name in ('policy', 'service_rate', 'buffer_size')
+             if getattr(args, name) is not None}
+    if queue:
+        options['queue'] = queue
+    if args.resume:
+        given = [name for name in SCENARIO_OPTIONS if getattr(args, name) != parser.get_default(name)]
+        if given:
+            parser.error(f"--resume continues the scenario saved in the checkpoint; "
+                         f"{', '.join('--' + name.replace('_', '-') for name in given)} cannot change it")
+    elif args.scenario == 'trace':
+        if args.trace is None:
+            parser.error('the trace scenario needs --trace')
+        options.update(trace=args.trace, geo=args.geo)
+        if args.attackers is not None:
+            options['attackers'] = args.attackers
+    network = load_road_network(args.osm)
+    with EventLog(args.log, level=LEVELS[args.log_level]) as log:
+        if args.resume:
+            path = latest_checkpoint(args.resume) if os.path.isdir(args.resume) else args.resume
+            if path is None:
+                parser.error(f'no checkpoint in {args.resume}')
+            sim = restore_checkpoint(path, network, log)
+            print(f"Resumed from {path} at {sim.now:.2f} s")
+        else:
+            sim = SCENARIOS[args.scenario](network, dt=args.dt, log=log, **options)
+        if args.store:
+            sim.use_store(args.store, preload=args.preload)
+        if args.replay_trajectory:
+            sim.replay_trajectory(args.replay_trajectory)
+        if args.record_trajectory:
+            sim.record_trajectory(args.record_trajectory, network)
+        if args.metrics:
+            sim.record_metrics(args.metrics, args.metrics_interval)
+        if args.checkpoint_dir:
+            sim.use_checkpoints(args.checkpoint_dir, args.checkpoint_interval, network)
+        if args.profile or args.cprofile or args.tracemalloc:
+            sim.use_profiler(cprofile_window=args.cprofile, tracemalloc_window=args.tracemalloc)
+        if args.visual:
+            run_visual(sim, network, args)
+        else:
+            sim.run(args.duration)
+    if sim.recorder is not None:
+        sim.recorder.close()
+    if sim.metrics is not None:
+        sim.metrics.close(sim)
+        print(f"Wrote {sim.metrics.rows} metrics samples to {args.metrics}")
+    sim.print_diagnostics()
+    if sim.store is not None:
+        sim.store.save_counters(sim)
+        stats = sim.store.stats()
+        sim.store.close()
+        print(f"Stored {stats['blocks']} blocks, {stats['revocations']} revocations "
+              f"and {stats['counters']} vehicle counters in {args.store} ({stats['bytes'] / 1024:.0f} KiB)")
+
+
+def _positive(text):
+    """Parse an integer of at least 1."""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, got {text!r}") from None
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected at least 1, got {value}")
+    return value
+
+
+def _window(text):
+    """Parse a FIRST:LAST tick window."""
+    first, _, last = text.partition(':')
+    try:
+        return int(first), int(last or first)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected FIRST:LAST ticks, got {text!r}") from None
+
+
+def run_visual(sim, network, args):
+    from .scenario import show
+
+    show(sim, network, args.duration, f'Vehicle Simulation - {args.scenario}', fps=args.fps,
+         ticks_per_frame=args.ticks_per_frame, speed=args.speed)
+
+
+if __name__ == '__main__':
+    main()
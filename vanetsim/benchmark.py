@@ -0,0 +1,163 @@
+"""Benchmark the headless scenarios at scale: python -m vanetsim.benchmark --osm map.osm
+
+Sweeps the Baseline, DDoS and BRSUM scenarios over vehicle counts, RSU
+counts and attack rates, one axis at a time from the scripts' defaults.
+Each case runs in a fresh process so its peak RSS is its own, and records
+startup time (building the scenario), ticks per second, packets per second
+and peak RSS. Results are appended as JSON lines tagged with the git
+commit, so runs on different commits can be compared with --compare.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .eventlog import QUIET, EventLog
+from .roads import DEFAULT_OSM_FILE, load_road_network
+from .routing import Router
+from .scenarios import SCENARIOS
+
+VEHICLE_COUNTS = (10, 100, 1000, 10000, 100000)
+RSU_COUNTS = (1, 4, 16, 64)
+ATTACK_RATES = (100.0, 1000.0, 10000.0)  # Packets per second per attacker
+DEFAULT_RESULTS = 'benchmarks.jsonl'
+
+
+def default_cases(scenarios=('baseline', 'ddos', 'brsum'), vehicles=VEHICLE_COUNTS, rsus=RSU_COUNTS,
+                  attack_rates=ATTACK_RATES):
+    """One-axis-at-a-time sweep around the scripts' ten vehicles and one RSU; attackers are half the fleet."""
+    cases = []
+    for scenario in scenarios:
+        attacked = scenario != 'baseline'
+        for count in vehicles:
+            case = {'scenario': scenario, 'vehicles': count}
+            if attacked:
+                case.update(vehicles=count - count // 2, attackers=count // 2)
+            cases.append(case)
+        for count in rsus:
+            if count > 1:
+                cases.append({'scenario': scenario, 'rsus': count})
+        if attacked:
+            for rate in attack_rates:
+                cases.append({'scenario': scenario, 'attack_rate': rate})
+    return cases
+
+
+def run_case(network, case, duration=1.0, dt=0.01):
+    """Build and run one case in this process and return its timings."""
+    options = {name: value for name, value in case.items() if name != 'scenario'}
+    started = time.perf_counter()
+    sim = SCENARIOS[case['scenario']](network, dt=dt, router=Router(network), log=EventLog(level=QUIET), **options)
+    built = time.perf_counter()
+    sim.run(duration)
+    finished = time.perf_counter()
+    elapsed = finished - built
+    packets = int(sim.fleet.sent[:len(sim.fleet)].sum())
+    return {
+        'startup_s': built - started,
+        'run_s': elapsed,
+        'ticks': sim.tick,
+        'ticks_per_s': sim.tick / elapsed if elapsed else 0.0,
+        'packets': packets,
+        'packets_per_s': packets / elapsed if elapsed else 0.0,
+        'events_per_s': sim.scheduler.processed / elapsed if elapsed else 0.0,
+    }
+
+
+def _isolated_case(osm, case, duration, dt):
+    """Worker entry point: load the network from its cache, run the case and add this process's peak RSS."""
+    started = time.perf_counter()
+    network = load_road_network(osm)
+    result = {'network_load_s': time.perf_counter() - started}
+    result.update(run_case(network, case, duration, dt))
+    result['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    return result
+
+
+def run_isolated(osm, case, duration=1.0, dt=0.01):
+    """Run one case in a freshly spawned process, so memory from earlier cases does not count."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(_isolated_case, osm, case, duration, dt).result()
+
+
+def git_commit():
+    """Commit of the working tree, marked '+dirty' with uncommitted changes, or None outside a checkout."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('+dirty' if dirty else '')
+
+
+def case_key(case):
+    return json.dumps(case, sort_keys=True)
+
+
+def read_results(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(path, old, new):
+    """Print ticks/s of every case run on both commits (prefixes match) and the speed-up."""
+    records = read_results(path)
+
+    def latest(prefix):
+        found = {}
+        for record in records:
+            if (record.get('commit') or '').startswith(prefix):
+                found[case_key(record['case'])] = record  # Later runs of the same case win
+        return found
+
+    before, after = latest(old), latest(new)
+    print(f"{'case':<60} {'old ticks/s':>12} {'new ticks/s':>12} {'speed-up':>9} {'old MB':>8} {'new MB':>8}")
+    for key in sorted(before.keys() & after.keys()):
+        a, b = before[key]['result'], after[key]['result']
+        ratio = b['ticks_per_s'] / a['ticks_per_s'] if a['ticks_per_s'] else float('inf')
+        print(f"{key:<60} {a['ticks_per_s']:>12.1f} {b['ticks_per_s']:>12.1f} {ratio:>8.2f}x "
+              f"{a['peak_rss_mb']:>8.1f} {b['peak_rss_mb']:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the headless scenarios across fleet and RSU sizes.')
+    parser.add_argument('--osm', default=DEFAULT_OSM_FILE, help='OSM road network file')
+    parser.add_argument('--scenario', action='append', choices=('baseline', 'ddos', 'brsum'),
+                        help='Scenario to benchmark; repeat for several (default: all three)')
+    parser.add_argument('--vehicles', type=int, nargs='+', default=VEHICLE_COUNTS, help='Fleet sizes to sweep')
+    parser.add_argument('--rsus', type=int, nargs='+', default=RSU_COUNTS, help='RSU counts to sweep')
+    parser.add_argument('--attack-rates', type=float, nargs='+', default=ATTACK_RATES,
+                        help='Packets per second per attacker to sweep')
+    parser.add_argument('--duration', type=float, default=1.0, help='Simulated seconds per case')
+    parser.add_argument('--dt', type=float, default=0.01, help='Simulated seconds per tick')
+    parser.add_argument('--output', default=DEFAULT_RESULTS, help='JSON lines file results are appended to')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='Compare the results of two commits in the output file instead of running')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(args.output, *args.compare)
+        return
+    load_road_network(args.osm)  # Build the network cache once, before the workers read it
+    cases = default_cases(tuple(args.scenario or ('baseline', 'ddos', 'brsum')), args.vehicles, args.rsus,
+                          args.attack_rates)
+    header = {'commit': git_commit(), 'python': sys.version.split()[0], 'platform': platform.platform(),
+              'osm': args.osm, 'duration': args.duration, 'dt': args.dt}
+    print(f"{'case':<60} {'startup s':>9} {'ticks/s':>10} {'packets/s':>12} {'peak MB':>8}")
+    for case in cases:
+        result = run_isolated(args.osm, case, args.duration, args.dt)
+        record = dict(header, time=time.time(), case=case, result=result)
+        with open(args.output, 'a') as f:
+            f.write(json.dumps(record) + '\n')  # Written per case, so an interrupted sweep keeps its results
+        print(f"{case_key(case):<60} {result['startup_s']:>9.2f} {result['ticks_per_s']:>10.1f} "
+              f"{result['packets_per_s']:>12.0f} {result['peak_rss_mb']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Checkpoints: the whole state of a simulation in one compressed file, restored into a new Simulation.
+
+A checkpoint holds the vehicle store, every Vehicle and RSU with its
+ledger, detector and queue, gossip state and the pending events, pickled
+and gzip-compressed. Things that are not simulation state are left out and
+supplied again on restore: the event log, the road network (referenced,
+not copied, when it is passed to ``save_checkpoint``), and profilers and
+recorders, which the caller attaches again if wanted. A coverage table is
+reloaded from the network's cache. Ledgers backed by a ``LedgerStore``
+keep their blocks in SQLite and cannot be checkpointed.
+
+Every restore of a checkpoint is an independent copy, so a warmed-up
+state can be forked into many variants. ``Checkpointer`` writes one every
+`interval` ticks so that a long run can resume after an interruption.
+"""
+import glob
+import gzip
+import os
+import pickle
+
+import numpy as np
+
+from .coverage import load_coverage
+from .eventlog import NULL_LOG, EventLog
+
+FORMAT_VERSION = 1
+KEEP = 2  # Checkpoints a Checkpointer leaves on disk
+
+
+class _Pickler(pickle.Pickler):
+    """Pickles a simulation, with the log, network and run instrumentation replaced by references."""
+
+    def __init__(self, f, sim, network):
+        super().__init__(f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.references = {id(sim.log): ('log',), id(NULL_LOG): ('null_log',)}
+        for obj in (sim.profiler, sim.recorder, sim.metrics, sim.checkpoints, sim._grid, sim._association,
+                    sim._road_association):
+            if obj is not None:
+                self.references[id(obj)] = ('none',)  # Rebuilt, or attached again by the caller
+        if network is not None:
+            self.references[id(network)] = ('network',)
+            self.references[id(sim.fleet.node_xy)] = ('node_xy',)
+
+    def persistent_id(self, obj):
+        return self.references.get(id(obj))
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, f, log, network):
+        super().__init__(f)
+        self.log = log
+        self.network = network
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+        if kind == 'log':
+            return self.log
+        if kind == 'null_log':
+            return NULL_LOG
+        if kind == 'none':
+            return None
+        if self.network is None:
+            raise ValueError("checkpoint refers to its road network; pass the network to restore it")
+        if kind == 'network':
+            return self.network
+        if kind == 'node_xy':
+            return np.asarray(self.network.world_xy, dtype=np.float64).reshape(-1, 2)
+        raise pickle.UnpicklingError(f"unknown checkpoint reference {pid!r}")
+
+
+def _fingerprint(network):
+    return None if network is None else [network.num_nodes, network.num_edges, network.min_x, network.max_y]
+
+
+def save_checkpoint(sim, path, network=None):
+    """Write the simulation's state to `path`, atomically; returns the number of bytes written.
+
+    With `network` given, the network is referenced instead of copied and
+    must be passed to restore_checkpoint.
+    """
+    if sim.store is not None:
+        raise ValueError("ledgers backed by a LedgerStore cannot be checkpointed")
+    sim.log.flush()
+    coverage = sim._road_association.coverage.interval if sim._road_association is not None else None
+    header = {'version': FORMAT_VERSION, 'tick': sim.tick, 'network': _fingerprint(network), 'coverage': coverage}
+    partial = path + '.partial'
+    with gzip.open(partial, 'wb', compresslevel=1) as f:  # Fast; the arrays and counters compress well anyway
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        _Pickler(f, sim, network).dump(sim)
+    os.replace(partial, path)  # An interrupted write never replaces the previous checkpoint
+    return os.path.getsize(path)
+
+
+def restore_checkpoint(path, network=None, log=None):
+    """A new Simulation in the state saved at `path`, logging to `log` (stdout by default)."""
+    log = log if log is not None else EventLog()
+    with gzip.open(path, 'rb') as f:
+        header = pickle.load(f)
+        if header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"unsupported checkpoint format in {path}")
+        if header['network'] is not None and network is not None and header['network'] != _fingerprint(network):
+            raise ValueError(f"{path} was saved on a different road network")
+        sim = _Unpickler(f, log, network).load()
+    log.tick = sim.tick
+    if header['coverage'] is not None:
+        if network is None:
+            raise ValueError("checkpoint uses a coverage table; pass the network to restore it")
+        points = [(rsu.x, rsu.y) for rsu in sim.rsus]
+        ranges = [rsu.comm_range for rsu in sim.rsus]
+        sim.use_coverage(load_coverage(network, points, ranges, header['coverage']), network)
+    return sim
+
+
+def latest_checkpoint(directory):
+    """Path of the newest checkpoint a Checkpointer wrote into `directory`, or None."""
+    paths = sorted(glob.glob(os.path.join(directory, 'tick_*.ckpt')))
+    return paths[-1] if paths else None
+
+
+class Checkpointer:
+    """Saves a checkpoint into `directory` every `interval` ticks, keeping the `keep` newest.
+
+    Checkpoints already in the directory, from the run being resumed, count
+    towards `keep`; those of later ticks than a new save are removed.
+    """
+
+    def __init__(self, directory, interval, network=None, keep=KEEP):
+        self.directory = directory
+        self.interval = interval
+        self.network = network
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+        self.saved = sorted(glob.glob(os.path.join(directory, 'tick_*.ckpt')))  # Oldest first, earlier runs' too
+
+    def step(self, sim):
+        """Called after every tick; saves on multiples of the interval."""
+        if sim.tick % self.interval:
+            return
+        path = os.path.join(self.directory, f'tick_{sim.tick:010d}.ckpt')
+        save_checkpoint(sim, path, self.network)
+        for stale in self.saved:
+            if stale > path:
+                os.remove(stale)  # Later ticks of a run this one was resumed from before, and has diverged from
+        self.saved = [saved for saved in self.saved if saved < path] + [path]
+        while len(self.saved) > self.keep:
+            os.remove(self.saved.pop(0))
@@ -0,0 +1,230 @@
+"""Precomputed RSU coverage of the road network, cached next to the map.
+
+RSUs never move and vehicles only travel along road edges, so the RSUs in
+range of a vehicle depend only on its current edge and how far along it
+it is. Each edge is split into equal intervals of at most ``interval``
+metres, and a table records the RSUs covering the midpoint of every
+interval together with the nearest of them. Range lookup during a run is
+then one array read per vehicle, and coverage statistics come straight
+from the table without running a simulation.
+
+Report coverage for a map: python -m vanetsim.coverage D:/HONS/Edinburgh.osm --spacing 500
+"""
+import argparse
+import hashlib
+import os
+
+import numpy as np
+
+from .spatial import RSUGrid
+
+DEFAULT_INTERVAL = 10.0  # Metres; also the resolution of table lookups
+_ARRAYS = ('edge_ptr', 'length', 'nearest', 'cover_ptr', 'cover')
+
+
+class CoverageMap:
+    """RSU coverage per interval of every road edge, in CSR layout.
+
+    The intervals of edge ``e`` are ``edge_ptr[e]:edge_ptr[e + 1]``; the RSUs
+    covering interval ``i`` are ``cover[cover_ptr[i]:cover_ptr[i + 1]]``.
+    """
+
+    def __init__(self, edge_ptr, length, nearest, cover_ptr, cover, interval=DEFAULT_INTERVAL, rsu_count=0):
+        self.edge_ptr = edge_ptr  # (E + 1,) int64 first interval of each edge
+        self.length = length  # (E,) float64 straight-line edge length in metres, as vehicles drive it
+        self.nearest = nearest  # (I,) int32 nearest RSU covering each interval, or -1
+        self.cover_ptr = cover_ptr  # (I + 1,) int64 CSR pointers into cover
+        self.cover = cover  # int32 RSU indices covering each interval, in RSU order
+        self.interval = interval
+        self.rsu_count = rsu_count  # Number of RSUs the table was built for
+
+    @property
+    def num_intervals(self):
+        return len(self.nearest)
+
+    @classmethod
+    def build(cls, network, points, ranges, interval=DEFAULT_INTERVAL, chunk_size=1 << 16):
+        """Compute the table for RSUs at `points` with communication `ranges` (metres)."""
+        sources, targets = network.edge_pairs()
+        start = np.asarray(network.world_xy)[sources]
+        delta = np.asarray(network.world_xy)[targets] - start
+        length = np.hypot(delta[:, 0], delta[:, 1])
+        counts = np.maximum(1, np.ceil(length / interval)).astype(np.int64)
+        edge_ptr = np.zeros(len(length) + 1, dtype=np.int64)
+        np.cumsum(counts, out=edge_ptr[1:])
+
+        grid = RSUGrid(points, ranges)
+        total = int(edge_ptr[-1])
+        edge_of = np.repeat(np.arange(len(length)), counts)
+        nearest = np.empty(total, dtype=np.int32)
+        cover_ptr = np.zeros(total + 1, dtype=np.int64)
+        covers = []
+        for lo in range(0, total, chunk_size):  # Chunked so the candidate matrices stay small
+            hi = min(lo + chunk_size, total)
+            edges = edge_of[lo:hi]
+            k = np.arange(lo, hi) - edge_ptr[edges]
+            mids = start[edges] + delta[edges] * ((k + 0.5) / counts[edges])[:, None]
+            cells = grid.cells_of(mids)
+            nearest[lo:hi] = grid.nearest(mids, cells)
+            indptr, rsus = grid.covering(mids, cells)
+            cover_ptr[lo + 1:hi + 1] = indptr[1:] + cover_ptr[lo]
+            covers.append(rsus.astype(np.int32))
+        cover = np.concatenate(covers) if covers else np.zeros(0, dtype=np.int32)
+        return cls(edge_ptr, length, nearest, cover_ptr, cover, interval, len(grid.points))
+
+    def _intervals(self, edges, offsets):
+        """Interval index for each (edge, metres from the edge start) pair."""
+        edges = np.asarray(edges, dtype=np.int64)
+        first = self.edge_ptr[edges]
+        count = self.edge_ptr[edges + 1] - first
+        length = self.length[edges]
+        fraction = np.divide(offsets, length, out=np.zeros(len(edges)), where=length > 0)
+        return first + np.clip((fraction * count).astype(np.int64), 0, count - 1)
+
+    def lookup(self, edges, offsets):
+        """Nearest covering RSU index, or -1, for vehicles `offsets` metres along `edges`."""
+        return self.nearest[self._intervals(edges, offsets)]
+
+    def covering(self, edge, offset):
+        """All RSU indices covering a point `offset` metres along `edge`."""
+        i = self._intervals([edge], [offset])[0]
+        return self.cover[self.cover_ptr[i]:self.cover_ptr[i + 1]]
+
+    def stats(self):
+        """Coverage statistics over the whole road network, lengths in metres.
+
+        Holes are maximal runs of uncovered intervals along one edge.
+        """
+        counts = np.diff(self.edge_ptr)  # Every edge has at least one interval
+        interval_length = np.repeat(self.length / counts, counts)
+        rsus_per_interval = np.diff(self.cover_ptr)
+        uncovered = rsus_per_interval == 0
+        after_uncovered = np.concatenate([[False], uncovered[:-1]])
+        after_uncovered[self.edge_ptr[:-1]] = False  # A run never continues onto the next edge
+        hole_id = np.cumsum(uncovered & ~after_uncovered) - 1
+        holes = np.bincount(hole_id[uncovered], weights=interval_length[uncovered])
+
+        road_length = float(self.length.sum())
+        covered_length = float(interval_length[~uncovered].sum())
+        uncovered_per_edge = np.add.reduceat(uncovered.astype(np.int64), self.edge_ptr[:-1]) if len(counts) else counts
+        return {
+            'road_length': road_length,
+            'covered_length': covered_length,
+            'coverage': covered_length / road_length if road_length else 0.0,
+            'overlap_length': float(interval_length[rsus_per_interval > 1].sum()),
+            'holes': len(holes),
+            'hole_length': float(holes.sum()),
+            'longest_hole': float(holes.max()) if len(holes) else 0.0,
+            'uncovered_edges': int(np.count_nonzero(uncovered_per_edge == counts)),
+        }
+
+    def save(self, path):
+        """Write the table to an .npz file, replacing any previous one atomically."""
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, interval=self.interval, rsu_count=self.rsu_count,
+                 **{name: getattr(self, name) for name in _ARRAYS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(*(data[name] for name in _ARRAYS), interval=float(data['interval']),
+                       rsu_count=int(data['rsu_count']))
+
+
+def coverage_key(network, points, ranges, interval):
+    """Short digest identifying a coverage table: the road geometry, RSU layout and interval."""
+    digest = hashlib.sha256()
+    for array in (network.world_xy, network.indptr, network.indices):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update(np.asarray(points, dtype=np.float64).tobytes())
+    digest.update(np.asarray(ranges, dtype=np.float64).tobytes())
+    digest.update(repr(float(interval)).encode())
+    return digest.hexdigest()[:16]
+
+
+def load_coverage(network, points, ranges, interval=DEFAULT_INTERVAL, cache_dir=None):
+    """Coverage table for the RSU layout, read from the network's cache directory when built before."""
+    cache_dir = cache_dir or network.cache_dir
+    if cache_dir is None:
+        return CoverageMap.build(network, points, ranges, interval)
+    path = os.path.join(cache_dir, f'coverage-{coverage_key(network, points, ranges, interval)}.npz')
+    if os.path.exists(path):
+        return CoverageMap.load(path)
+    coverage = CoverageMap.build(network, points, ranges, interval)
+    coverage.save(path)
+    return coverage
+
+
+class RoadAssociation:
+    """Vehicle-to-RSU association read from a CoverageMap by each vehicle's current edge.
+
+    Hops of a path that are not road edges (the direct fallback between
+    unconnected waypoints) are looked up through the RSU grid instead.
+    Results are exact to the resolution of the table's intervals.
+    """
+
+    def __init__(self, coverage, network, fallback):
+        self.coverage = coverage
+        self.network = network
+        self.fallback = fallback  # RSUGrid over the same RSUs
+        self.edge_source = network.edge_pairs()[0]
+        self.hop_edge = np.zeros(0, dtype=np.int64)  # Path position -> edge arriving at that node, or -1
+        self._vehicles = 0  # Vehicles whose path hops are in hop_edge
+
+    def _extend(self, fleet):
+        """Resolve the road edge of every hop on paths added since the last call."""
+        fleet.flush_paths()
+        ids = np.arange(self._vehicles, fleet.size)
+        self._vehicles = fleet.size
+        if not len(ids):
+            return
+        starts, lens = fleet.path_start[ids], fleet.path_len[ids].astype(np.int64)
+        within = np.arange(lens.sum()) - np.repeat(np.cumsum(lens) - lens, lens)  # Position inside each path
+        at = np.repeat(starts, lens) + within
+        before = np.where(within == 0, at + np.repeat(lens, lens) - 1, at - 1)  # Paths loop back to the start
+        edges = self.network.edge_index(fleet.path_nodes[before], fleet.path_nodes[at])
+        self.hop_edge = np.concatenate([self.hop_edge, edges])
+
+    def update(self, fleet):
+        """Nearest covering RSU index, or -1, for every vehicle of the fleet."""
+        self._extend(fleet)
+        n = fleet.size
+        pos = fleet.pos[:n]
+        edge = self.hop_edge[fleet.path_start[:n] + fleet.target[:n]]
+        on_road = edge >= 0
+        result = np.empty(n, dtype=np.int64)
+        if on_road.any():
+            edges = edge[on_road]
+            offset = np.hypot(*(pos[on_road] - self.network.world_xy[self.edge_source[edges]]).T)
+            result[on_road] = self.coverage.lookup(edges, offset)
+        if not on_road.all():
+            result[~on_road] = self.fallback.nearest(pos[~on_road])
+        return result
+
+
+def main(argv=None):
+    from .roads import DEFAULT_OSM_FILE, load_road_network
+    from .scenarios import rsu_sites
+
+    parser = argparse.ArgumentParser(description='Report RSU coverage of a road network without running a simulation.')
+    parser.add_argument('osm', nargs='?', default=DEFAULT_OSM_FILE, help='OSM road network file')
+    parser.add_argument('--spacing', type=float, default=500.0, help='Metres between RSU grid sites')
+    parser.add_argument('--range', type=float, default=300.0, help='RSU communication range in metres')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='Coverage table resolution in metres')
+    args = parser.parse_args(argv)
+
+    network = load_road_network(args.osm)
+    sites = rsu_sites(network, args.spacing)
+    stats = load_coverage(network, sites, [args.range] * len(sites), args.interval).stats()
+    print(f"RSUs: {len(sites)}")
+    print(f"Road length: {stats['road_length'] / 1000:.1f} km")
+    print(f"Covered: {stats['covered_length'] / 1000:.1f} km ({stats['coverage']:.1%})")
+    print(f"Covered by more than one RSU: {stats['overlap_length'] / 1000:.1f} km")
+    print(f"Coverage holes: {stats['holes']} totalling {stats['hole_length'] / 1000:.1f} km, "
+          f"longest {stats['longest_hole']:.0f} m")
+    print(f"Edges with no coverage: {stats['uncovered_edges']}")
+
+
+if __name__ == '__main__':
+    main()
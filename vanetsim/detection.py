@@ -0,0 +1,191 @@
+"""Packet-rate detectors deciding when a ledger RSU revokes a key.
+
+A detector sees one call per accepted packet, ``observe(key, now)``, and
+returns True when the key is sending faster than allowed. Keys are vehicle
+ids. The original BRSUM rule, a lifetime packet count, is kept as
+``LifetimeCounter``; the others judge the recent rate, so a legitimate
+vehicle revisiting an RSU over a long run is never mistaken for an
+attacker.
+
+Memory: ``TokenBucket`` and ``SlidingWindow`` keep a small entry per key
+and drop it once the key has been idle long enough that forgetting it
+changes nothing. ``CountMinSketch`` runs in fixed memory whatever the
+number of keys, at the price of occasionally overestimating a key's rate.
+"""
+import random
+
+DEFAULT_BURST = 50  # Packets a key may send back-to-back, the original BRSUM threshold
+DEFAULT_RATE = 100.0  # Sustained packets per second allowed per key, five times the legitimate send rate
+SWEEP_INTERVAL = 1.0  # Simulated seconds between idle-key sweeps
+_PRIME = (1 << 61) - 1  # Modulus of the sketch's hash family
+
+
+class LifetimeCounter:
+    """The original rule: flag a key once it has sent more than `threshold` packets in total.
+
+    Memory grows with every key ever seen, and any vehicle that stays in
+    range long enough is flagged eventually; the scripts only avoid that by
+    checking the vehicle's is_malicious flag, which a real RSU cannot see.
+    """
+
+    def __init__(self, threshold=DEFAULT_BURST):
+        self.threshold = threshold
+        self.counts = {}  # Key -> packets seen
+
+    def __len__(self):
+        return len(self.counts)
+
+    def observe(self, key, now):
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        return count > self.threshold
+
+    def forget(self, key):
+        self.counts.pop(key, None)
+
+
+class TokenBucket:
+    """Per-key token bucket: `burst` packets at once, refilled at `rate` packets per second.
+
+    A bucket left idle for burst / rate seconds is full again, exactly like
+    a new one, so idle keys are evicted without changing any decision.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.idle_timeout = burst / rate  # Time for an empty bucket to refill
+        self.buckets = {}  # Key -> [tokens, time of last packet]
+        self._next_sweep = SWEEP_INTERVAL
+        self.evicted = 0  # Idle keys dropped so far
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def observe(self, key, now):
+        if now >= self._next_sweep:
+            self.evict(now)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self.buckets[key] = [self.burst - 1, now]
+            return False
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate) - 1
+        bucket[0], bucket[1] = tokens, now
+        return tokens < 0
+
+    def evict(self, now):
+        """Drop the keys whose buckets have refilled completely."""
+        cutoff = now - self.idle_timeout
+        idle = [key for key, bucket in self.buckets.items() if bucket[1] <= cutoff]
+        for key in idle:
+            del self.buckets[key]
+        self.evicted += len(idle)
+        self._next_sweep = now + SWEEP_INTERVAL
+
+    def forget(self, key):
+        self.buckets.pop(key, None)
+
+
+class SlidingWindow:
+    """Per-key sliding-window counter: at most `limit` packets in any `window` seconds.
+
+    Each key keeps counts for the current and previous fixed windows; the
+    previous count is weighted by how much of it still overlaps the sliding
+    window. Keys idle for two whole windows hold nothing and are evicted.
+    """
+
+    def __init__(self, limit=DEFAULT_BURST, window=DEFAULT_BURST / DEFAULT_RATE):
+        self.limit = limit
+        self.window = window
+        self.counters = {}  # Key -> [window number, count in it, count in the window before]
+        self._next_sweep = SWEEP_INTERVAL
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.counters)
+
+    def observe(self, key, now):
+        if now >= self._next_sweep:
+            self.evict(now)
+        position = now / self.window
+        number = int(position)
+        counter = self.counters.get(key)
+        if counter is None:
+            counter = self.counters[key] = [number, 0, 0]
+        elif counter[0] != number:
+            counter[2] = counter[1] if counter[0] == number - 1 else 0
+            counter[0], counter[1] = number, 0
+        counter[1] += 1
+        estimate = counter[1] + counter[2] * (1 - (position - number))
+        return estimate > self.limit
+
+    def evict(self, now):
+        """Drop the keys with no packets in the current or previous window."""
+        number = int(now / self.window)
+        idle = [key for key, counter in self.counters.items() if counter[0] < number - 1]
+        for key in idle:
+            del self.counters[key]
+        self.evicted += len(idle)
+        self._next_sweep = now + SWEEP_INTERVAL
+
+    def forget(self, key):
+        self.counters.pop(key, None)
+
+
+class CountMinSketch:
+    """Fixed-memory heavy-hitter detector: a sliding-window rate limit over a Count-Min Sketch.
+
+    Counts for all keys share `depth` rows of `width` counters per window, so
+    memory is the same for ten vehicles or a million. A key's count is the
+    minimum over its rows and can only be overestimated, by about
+    e / width of the window's total traffic with probability 1 - e^-depth.
+    """
+
+    def __init__(self, limit=DEFAULT_BURST, window=DEFAULT_BURST / DEFAULT_RATE, width=2048, depth=4, seed=0):
+        self.limit = limit
+        self.window = window
+        self.width = width
+        self.depth = depth
+        rng = random.Random(seed)
+        self._hashes = [(rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(depth)]
+        self._number = 0  # Current window number
+        self._current = self._empty()
+        self._previous = self._empty()
+
+    def __len__(self):
+        return 0  # Nothing is stored per key
+
+    def _empty(self):
+        return [[0] * self.width for _ in range(self.depth)]
+
+    def _rotate(self, number):
+        self._previous = self._current if number == self._number + 1 else self._empty()
+        self._current = self._empty()
+        self._number = number
+
+    def observe(self, key, now):
+        position = now / self.window
+        number = int(position)
+        if number != self._number:
+            self._rotate(number)
+        width = self.width
+        current, previous = float('inf'), float('inf')
+        for (a, b), row, old in zip(self._hashes, self._current, self._previous):
+            column = (a * key + b) % _PRIME % width
+            count = row[column] + 1
+            row[column] = count
+            current = min(current, count)
+            previous = min(previous, old[column])
+        estimate = current + previous * (1 - (position - number))
+        return estimate > self.limit
+
+    def forget(self, key):
+        pass  # Counts decay with the windows; nothing per key to drop
+
+
+DETECTORS = {
+    'lifetime': LifetimeCounter,
+    'token-bucket': TokenBucket,
+    'sliding-window': SlidingWindow,
+    'count-min': CountMinSketch,
+}
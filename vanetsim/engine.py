@@ -0,0 +1,328 @@
+"""Headless fixed-timestep simulation engine.
+
+The engine advances a simulated clock in fixed ticks instead of reading
+``time.time()``, never sleeps and never touches the display, so a run takes
+as long as the CPU needs and produces the same packet counts on any machine.
+
+Movement advances in fixed ticks, while packet emissions are discrete events
+on an ``EventScheduler``: each vehicle schedules its next packet one send
+interval ahead, so a flooding vehicle really emits thousands of packets per
+simulated second instead of one per frame.
+
+Vehicle kinematics live in a struct-of-arrays ``VehicleStore`` and are
+stepped for all vehicles at once, in world coordinates (metres) with speeds
+in m/s. RSU association goes through a uniform grid over RSU coverage
+(``RSUGrid``), refreshed once per movement step and reused across ticks for
+vehicles that stay in a cell with an unambiguous answer, or, once
+``use_coverage`` is called, is read from a precomputed per-edge coverage table.
+"""
+import time
+
+from .checkpoint import Checkpointer
+from .coverage import RoadAssociation
+from .eventlog import AUTHENTICATE, SEND, EventLog
+from .events import EventScheduler
+from .fleet import VehicleStore
+from .gossip import GossipNetwork
+from .metrics import MetricsRecorder
+from .profiling import Profiler
+from .queueing import queue_stats
+from .spatial import RSUGrid
+from .store import LedgerStore
+from .trajectory import TrajectoryRecorder, TrajectoryReplay
+
+
+class Simulation:
+    """Vehicles and RSUs advanced together on a fixed-timestep simulated clock."""
+
+    def __init__(self, node_positions, dt=0.01, log=None, cell_size=None):
+        self.dt = dt  # Simulated seconds per tick
+        self.tick = 0  # Number of ticks simulated so far
+        self.fleet = VehicleStore(node_positions)  # Road node positions in metres; vehicle state
+        self.vehicles = []  # Vehicle objects, indexed by vehicle id
+        self.rsus = []
+        self.scheduler = EventScheduler()
+        self.log = log if log is not None else EventLog()  # State changes to stdout by default
+        self.cell_size = cell_size  # Grid cell size in metres, None to derive it from the RSU ranges
+        self._grid = None  # RSUGrid, rebuilt when RSUs are added
+        self._road_association = None  # RoadAssociation when a coverage table is in use
+        self.gossip = None  # GossipNetwork when ledger RSUs replicate revocations
+        self.store = None  # LedgerStore persisting ledgers and packet counters
+        self.profiler = None  # Profiler timing each phase of every tick
+        self.recorder = None  # TrajectoryRecorder saving every tick's movement
+        self.metrics = None  # MetricsRecorder streaming per-tick counters
+        self.checkpoints = None  # Checkpointer saving the state every few ticks
+        self.mobility = None  # TrajectoryReplay or TraceMobility standing in for movement
+        self._idle = set()  # Ids of inactive vehicles whose emissions have stopped
+        self._association = None  # Vehicle id -> RSU index or -1, valid until the next movement step
+
+    @property
+    def now(self):
+        """Current simulated time in seconds."""
+        return self.tick * self.dt  # Derived from the tick count so it never accumulates rounding error
+
+    def add_vehicle(self, vehicle, delay=None):
+        """Register a vehicle created on this simulation's fleet and schedule its first packet.
+
+        The first packet goes out `delay` seconds from now, one send interval by default.
+        """
+        self.vehicles.append(vehicle)
+        self._association = None
+        delay = vehicle.send_interval if delay is None else delay
+        self.scheduler.schedule(self.now + delay, self._emit, vehicle)
+        return vehicle
+
+    def set_active(self, vehicle, active):
+        """Stop or resume a vehicle's packets, for mobility sources where vehicles come and go."""
+        vehicle.active = active
+        if active and vehicle.vid in self._idle:
+            self._idle.discard(vehicle.vid)
+            self.scheduler.schedule(self.now + vehicle.send_interval, self._emit, vehicle)
+
+    def add_rsu(self, rsu):
+        rsu.log = self.log
+        self.rsus.append(rsu)
+        self._grid = None
+        self._road_association = None  # A coverage table no longer matches the RSU set
+        self._association = None
+        return rsu
+
+    def nearest_rsu(self, vehicle):
+        """Return the closest RSU whose range covers the vehicle, or None."""
+        if self._association is None:
+            # Positions only change on movement steps, so one batched query serves the whole tick
+            start = time.perf_counter()
+            if self._road_association is not None:
+                self._association = self._road_association.update(self.fleet)
+            else:
+                self._association = self.rsu_grid.update(self.fleet.pos[:len(self.fleet)])
+            if self.profiler is not None:
+                self.profiler.add('association', time.perf_counter() - start)
+        index = self._association[vehicle.vid]
+        return self.rsus[index] if index >= 0 else None
+
+    @property
+    def rsu_grid(self):
+        """Spatial index over the RSUs, built on first use after the RSU set changes."""
+        if self._grid is None:
+            points = [(rsu.x, rsu.y) for rsu in self.rsus]
+            ranges = [rsu.comm_range for rsu in self.rsus]
+            self._grid = RSUGrid(points, ranges, self.cell_size)
+        return self._grid
+
+    def use_coverage(self, coverage, network):
+        """Look up RSU association in a CoverageMap built for this simulation's RSUs, in order."""
+        if coverage.rsu_count != len(self.rsus):
+            raise ValueError(f"coverage table was built for {coverage.rsu_count} RSUs, simulation has {len(self.rsus)}")
+        self._road_association = RoadAssociation(coverage, network, self.rsu_grid)
+        self._association = None
+
+    def use_gossip(self, **options):
+        """Replicate revocations between the ledger RSUs added so far; options go to GossipNetwork."""
+        self.gossip = GossipNetwork(self.scheduler, self.rsus, **options)
+        return self.gossip
+
+    def use_store(self, path, preload=None):
+        """Persist ledger blocks, revocations and packet counters in the SQLite database at `path`.
+
+        preload names the database of an earlier run; every ledger RSU starts
+        with the keys revoked there.
+        """
+        self.store = LedgerStore(path)
+        keys = set()
+        if preload is not None:
+            with LedgerStore(preload) as previous:
+                keys = previous.revoked_keys()
+        for rsu in self.rsus:
+            if hasattr(rsu, 'ledger'):
+                rsu.ledger.attach(self.store, rsu.rid)
+                for key in sorted(keys):
+                    rsu.ledger.adopt(key, self.now)
+        return self.store
+
+    def _emit(self, vehicle):
+        """Packet emission event: send if in range, then schedule the next one."""
+        if not vehicle.active:
+            self._idle.add(vehicle.vid)  # set_active restarts the emissions
+            return
+        now = self.scheduler.now
+        rsu = self.nearest_rsu(vehicle)
+        if rsu is None or rsu.rid in vehicle.revoked_by:
+            # Out of range, or blocked by this RSU, until the vehicle moves; skip ahead to the next movement step
+            next_time = max(now + vehicle.send_interval, (self.tick + 1) * self.dt)
+        else:
+            if not vehicle.authenticated:
+                self.log.event(AUTHENTICATE, vehicle.vid, rsu.rid)
+            if self.log.packets:
+                self.log.event(SEND, vehicle.vid, rsu.rid)
+            vehicle.send_packet(rsu, now)
+            if not rsu.operational and not vehicle.is_malicious:
+                vehicle.communication_error = True  # Legitimate vehicle lost the RSU
+            next_time = now + vehicle.send_interval
+        self.scheduler.schedule(next_time, self._emit, vehicle)
+
+    def record_trajectory(self, path, network=None, **options):
+        """Save every tick's vehicle positions from now on; close the returned recorder when done."""
+        self.recorder = TrajectoryRecorder(path, self.dt, network, **options)
+        return self.recorder
+
+    def record_metrics(self, path, interval=1, **options):
+        """Stream packet, queue and revocation counters every `interval` ticks; close the returned recorder when done."""
+        self.metrics = MetricsRecorder(path, self.dt, interval, **options)
+        if self.tick:
+            self.metrics.baseline(self)  # Resumed from a checkpoint: count from here
+        return self.metrics
+
+    def replay_trajectory(self, path):
+        """Move the vehicles along a recorded trajectory instead of simulating movement.
+
+        Call once every vehicle is added; the trace must have the same fleet and timestep.
+        """
+        return self.use_mobility(TrajectoryReplay(path))
+
+    def use_mobility(self, source):
+        """Take vehicle positions from `source` every tick: anything with check(fleet, dt) and apply(fleet, tick)."""
+        source.check(self.fleet, self.dt)
+        self.mobility = source
+        return source
+
+    def use_checkpoints(self, directory, interval, network=None, **options):
+        """Save a checkpoint into `directory` every `interval` ticks; see vanetsim.checkpoint."""
+        self.checkpoints = Checkpointer(directory, interval, network, **options)
+        return self.checkpoints
+
+    def use_profiler(self, profiler=None, **options):
+        """Time every tick's phases from now on; `options` are Profiler keyword arguments."""
+        self.profiler = profiler if profiler is not None else Profiler(**options)
+        return self.profiler
+
+    def step(self):
+        """Advance one tick: run the events due before it, then move every vehicle."""
+        if self.profiler is not None:
+            return self._profiled_step(self.profiler)
+        self.scheduler.run_until((self.tick + 1) * self.dt)
+        self.tick += 1
+        self.log.tick = self.tick
+        self._move()
+        if self.checkpoints is not None:
+            self.checkpoints.step(self)
+
+    def _move(self):
+        """Movement step: live kinematics, or the next frame of a recorded trajectory or trace."""
+        if self.mobility is not None:
+            self.mobility.apply(self.fleet, self.tick)
+        else:
+            self.fleet.step(self.dt)
+        if self.recorder is not None:
+            self.recorder.record(self.fleet)
+        if self.metrics is not None:
+            self.metrics.sample(self)
+        self._association = None
+
+    def _profiled_step(self, profiler):
+        """step() with its phases timed; association lookups made by events are charged separately."""
+        processed = self.scheduler.processed
+        before = profiler.elapsed('association')
+        start = time.perf_counter()
+        self.scheduler.run_until((self.tick + 1) * self.dt)
+        moved = time.perf_counter()
+        association = profiler.elapsed('association') - before
+        profiler.add('comms', moved - start - association, self.scheduler.processed - processed)
+        self.tick += 1
+        self.log.tick = self.tick
+        self._move()
+        profiler.add('movement', time.perf_counter() - moved)
+        if self.checkpoints is not None:
+            self.checkpoints.step(self)
+        profiler.end_tick()
+
+    def run(self, duration):
+        """Run until `duration` simulated seconds have elapsed."""
+        end_tick = round(duration / self.dt)
+        while self.tick < end_tick:
+            self.step()
+        self.finish()
+        self.log.flush()
+        if self.store is not None:
+            self.store.save_counters(self)
+            self.store.flush()
+        return self
+
+    def finish(self):
+        """Bring ledgers and queues up to the current time, as run() does at its end.
+
+        Commits the blocks that fell due after the last packet and serves
+        the packets whose service started after the last arrival. Both
+        happen in time order, so finishing early changes nothing later.
+        """
+        now = self.now
+        for rsu in self.rsus:
+            if hasattr(rsu, 'ledger'):
+                rsu.ledger.advance(now)
+            if hasattr(rsu, 'service_time'):
+                rsu.advance(now)
+
+    def report(self):
+        """Return packet totals grouped by vehicle type; read-only, so call finish() first after stepping by hand."""
+        n = len(self.fleet)
+        malicious = self.fleet.is_malicious[:n]
+        sent, received = self.fleet.sent[:n], self.fleet.received[:n]
+        report = {
+            'ticks': self.tick,
+            'events': self.scheduler.processed,
+            'simulated_time': self.now,
+            'malicious_sent': int(sent[malicious].sum()),
+            'malicious_received': int(received[malicious].sum()),
+            'legitimate_sent': int(sent[~malicious].sum()),
+            'legitimate_received': int(received[~malicious].sum()),
+        }
+        ledger_rsus = [rsu for rsu in self.rsus if hasattr(rsu, 'ledger')]
+        if ledger_rsus:
+            delays = [delay for rsu in ledger_rsus for delay in rsu.ledger.revocation_delays]
+            report.update({
+                'blocked': sum(rsu.blocked for rsu in ledger_rsus),
+                'leaked': sum(rsu.leaked for rsu in ledger_rsus),
+                'blocks': sum(len(rsu.ledger) for rsu in ledger_rsus),
+                'revocations': len(delays),
+                'mean_revocation_delay': sum(delays) / len(delays) if delays else 0.0,
+                'legitimate_revoked': sum(1 for v in self.vehicles if v.revoked and not v.is_malicious),
+            })
+        queue_rsus = [rsu for rsu in self.rsus if hasattr(rsu, 'service_time')]
+        if queue_rsus:
+            report.update(queue_stats(queue_rsus))
+        if self.gossip is not None:
+            report.update(self.gossip.stats())
+        if hasattr(self.mobility, 'stats'):
+            report.update(self.mobility.stats())
+        return report
+
+    def print_diagnostics(self):
+        """Print the same per-vehicle packet diagnostics as the visual scripts."""
+        print("\nSimulation ended.\n")
+        for label, is_malicious in (('Malicious', True), ('Legitimate', False)):
+            group = [v for v in self.vehicles if v.is_malicious == is_malicious]
+            if not group:
+                continue
+            print(f"{label} vehicles sent packets: {sum(v.sent_packets for v in group)}")
+            print(f"{label} vehicles received packets: {sum(v.received_packets for v in group)}")
+            print(f"-- Detailed {label} Vehicle Data --")
+            for idx, vehicle in enumerate(group, start=1):
+                print(f"{label} Vehicle {idx}: Sent {vehicle.sent_packets} - Received {vehicle.received_packets}")
+            print("\n")
+        report = self.report()
+        if 'blocks' in report:
+            print(f"Ledger: {report['blocks']} blocks, {report['revocations']} revocations, "
+                  f"mean detection-to-revocation delay {report['mean_revocation_delay'] * 1000:.1f} ms")
+            print(f"Packets leaked before revocation: {report['leaked']}, blocked after: {report['blocked']}")
+        if 'max_buffer' in report:
+            for label in ('legitimate', 'malicious'):
+                print(f"{label.capitalize()} packets queued: {report[label + '_arrived']}, "
+                      f"lost {report[label + '_loss'] * 100:.1f}%, "
+                      f"mean latency {report[label + '_mean_latency'] * 1000:.1f} ms, "
+                      f"max {report[label + '_max_latency'] * 1000:.1f} ms")
+        if 'gossip_messages' in report:
+            print(f"Gossip: {report['revocations_fully_propagated']} revocations reached every RSU, "
+                  f"mean {report['mean_propagation_time'] * 1000:.1f} ms, max {report['max_propagation_time'] * 1000:.1f} ms")
+            print(f"Attack packets accepted while revocations propagated: {report['leaked_during_propagation']}")
+        if self.profiler is not None:
+            self.profiler.print_summary()
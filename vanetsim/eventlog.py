@@ -0,0 +1,144 @@
+"""Buffered, levelled event log replacing per-packet print() calls.
+
+Events are (tick, vehicle id, event type, RSU id) records. They are
+collected in memory and handed in batches to a background thread that
+writes them either as packed binary records (11 bytes each, readable with
+``read_event_log``) or as text lines. The level decides what is recorded:
+QUIET records nothing, NOTICE records state changes such as an RSU going
+offline or a key being revoked, PACKET also records every packet.
+"""
+import os
+import queue
+import struct
+import sys
+import threading
+
+import numpy as np
+
+QUIET = 0
+NOTICE = 1
+PACKET = 2
+LEVELS = {'quiet': QUIET, 'notice': NOTICE, 'packet': PACKET}
+
+# Event types
+SEND = 0  # Vehicle emitted a packet
+ACCEPT = 1  # RSU processed a packet
+DROP = 2  # RSU offline or overloaded, packet lost
+BLOCK = 3  # Packet from a revoked key dropped
+AUTHENTICATE = 4  # Vehicle authenticated its key on first contact
+REVOKE = 5  # RSU detected an attack and revoked the key
+RSU_DOWN = 6  # RSU stopped operating
+EVENT_NAMES = ['SEND', 'ACCEPT', 'DROP', 'BLOCK', 'AUTHENTICATE', 'REVOKE', 'RSU_DOWN']
+EVENT_LEVELS = [PACKET, PACKET, PACKET, PACKET, NOTICE, NOTICE, NOTICE]
+
+RECORD = struct.Struct('<IiBh')  # tick, vehicle id, event type, RSU id
+RECORD_DTYPE = np.dtype([('tick', '<u4'), ('vid', '<i4'), ('event', 'u1'), ('rsu', '<i2')])
+
+
+class EventLog:
+    """Collects events in batches and writes them from a background thread.
+
+    path None writes text to stdout. Callers on the packet hot path should
+    test the ``packets`` flag before building an event.
+    """
+
+    def __init__(self, path=None, level=NOTICE, binary=None, batch_size=8192):
+        self.level = level
+        self.packets = level >= PACKET  # Cheap flag for the per-packet hot path
+        self.path = path
+        self.binary = path is not None and (binary if binary is not None else not path.endswith('.txt'))
+        self.batch_size = batch_size
+        self.tick = 0  # Current tick, kept up to date by the simulation
+        self.counts = [0] * len(EVENT_NAMES)  # Events recorded per type
+        self._batch = []
+        self._queue = None
+        self._thread = None
+        self._file = None
+        self._error = None  # Exception that stopped the writer, raised again by flush()
+
+    def event(self, kind, vid=-1, rid=-1):
+        """Record one event at the current tick if the level allows it."""
+        if EVENT_LEVELS[kind] > self.level:
+            return
+        self.counts[kind] += 1
+        self._batch.append((self.tick, vid, kind, rid))
+        if len(self._batch) >= self.batch_size:
+            self._hand_off()
+
+    def _hand_off(self):
+        if self._thread is None:
+            self._open()
+        self._queue.put(self._batch)
+        self._batch = []
+
+    def _open(self):
+        if self.path is None:
+            self._file = sys.stdout
+        else:
+            self._file = open(self.path, 'ab' if self.binary else 'a')
+        self._queue = queue.Queue(maxsize=64)  # Bounded, so a slow disk applies back-pressure
+        self._thread = threading.Thread(target=self._write_batches, name='vanetsim-eventlog', daemon=True)
+        self._thread.start()
+
+    def _write_batches(self):
+        pack = RECORD.pack
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                if self._error is not None:
+                    continue  # After a failure, later batches are discarded
+                if self.binary:
+                    self._file.write(b''.join([pack(*record) for record in batch]))
+                else:
+                    self._file.write(''.join([format_event(*record) + '\n' for record in batch]))
+                self._file.flush()
+            except Exception as error:
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Hand off pending events and wait until they are written."""
+        if self._batch:
+            self._hand_off()
+        if self._queue is not None:
+            self._queue.join()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        """Flush, stop the writer thread and close the file."""
+        if self.path is not None and self._thread is None:
+            self._open()  # Still create the file when nothing was recorded
+        try:
+            self.flush()
+        finally:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+                if self._file is not sys.stdout:
+                    self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def format_event(tick, vid, kind, rid):
+    """One text line for an event record."""
+    return f"[tick {tick}] {EVENT_NAMES[kind]} vehicle={vid} rsu={rid}"
+
+
+def read_event_log(path):
+    """Load a binary event log as a NumPy structured array (memory-mapped)."""
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r')
+
+
+NULL_LOG = EventLog(level=QUIET)  # Default for models used outside a simulation
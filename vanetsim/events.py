@@ -0,0 +1,51 @@
+"""Discrete-event scheduler used for packet emissions and other timed work."""
+import heapq
+import itertools
+
+
+class EventScheduler:
+    """Priority queue of callbacks ordered by simulated time.
+
+    Events with equal times run in the order they were scheduled, so runs
+    are deterministic. The cost of a run depends on the number of events,
+    not on how many vehicles exist.
+    """
+
+    def __init__(self):
+        self._queue = []  # Heap of (time, sequence, callback, args)
+        self._sequence = itertools.count()  # Tie-breaker keeping FIFO order for equal times
+        self.now = 0.0  # Time of the event being processed
+        self.processed = 0  # Number of events run so far
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        sequence = next(self._sequence)
+        self._sequence = itertools.count(sequence)  # Put back the number read
+        state['_sequence'] = sequence  # Counters cannot be pickled on every Python version
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._sequence = itertools.count(state['_sequence'])
+
+    def __len__(self):
+        return len(self._queue)
+
+    def schedule(self, time, callback, *args):
+        """Run callback(*args) at simulated `time`."""
+        heapq.heappush(self._queue, (time, next(self._sequence), callback, args))
+
+    def peek_time(self):
+        """Time of the next pending event, or None if the queue is empty."""
+        return self._queue[0][0] if self._queue else None
+
+    def run_until(self, until):
+        """Run every event scheduled strictly before `until`."""
+        queue = self._queue
+        heappop = heapq.heappop
+        while queue and queue[0][0] < until:
+            time, _, callback, args = heappop(queue)
+            self.now = time
+            self.processed += 1
+            callback(*args)
+        self.now = until
@@ -0,0 +1,125 @@
+"""Struct-of-arrays vehicle state, stepped for every vehicle in one batch.
+
+Positions, path progress, speeds and packet counters live in NumPy arrays
+indexed by vehicle id, so movement, waypoint advance and loop-back cost a few
+array operations per tick instead of a Python call per vehicle. Vehicle
+objects and sprites are thin views that read their row of these arrays.
+"""
+import itertools
+
+import numpy as np
+
+
+class VehicleStore:
+    """Kinematic and packet-counter state for all vehicles of a simulation."""
+
+    def __init__(self, node_positions, capacity=64):
+        self.node_xy = np.asarray(node_positions, dtype=np.float64).reshape(-1, 2)  # Node index -> (x, y)
+        self.size = 0  # Number of vehicles stored
+        self.pos = np.zeros((capacity, 2))  # Current (x, y) of each vehicle
+        self.speed = np.zeros(capacity)  # Metres per second
+        self.path_start = np.zeros(capacity, dtype=np.int64)  # Offset of the path in path_nodes
+        self.path_len = np.zeros(capacity, dtype=np.int32)
+        self.target = np.zeros(capacity, dtype=np.int32)  # Index of the current target within the path
+        self.sent = np.zeros(capacity, dtype=np.int64)  # Packets sent
+        self.received = np.zeros(capacity, dtype=np.int64)  # Packets accepted by an RSU
+        self.is_malicious = np.zeros(capacity, dtype=bool)
+        self.path_nodes = np.zeros(0, dtype=np.int64)  # All paths concatenated
+        self._pending_paths = []  # Paths added since path_nodes was last rebuilt
+        self._path_total = 0  # Length of path_nodes including pending paths
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, needed):
+        capacity = len(self.pos)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2  # Amortised doubling keeps bulk spawning linear
+        for name in ('pos', 'speed', 'path_start', 'path_len', 'target', 'sent', 'received', 'is_malicious'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, path, offset=(0, 0), speed=0.0, is_malicious=False):
+        """Add one vehicle starting at the first node of its looping path; return its id."""
+        if len(path) == 0:
+            raise ValueError("vehicle path must contain at least one node")
+        vid = self.size
+        self._grow(vid + 1)
+        self.pos[vid] = self.node_xy[path[0]] + offset
+        self.speed[vid] = speed
+        self.path_start[vid] = self._path_total
+        self.path_len[vid] = len(path)
+        self.is_malicious[vid] = is_malicious
+        self._pending_paths.append(np.asarray(path, dtype=np.int64))
+        self._path_total += len(path)
+        self.size += 1
+        return vid
+
+    def add_many(self, paths, offsets=None, speed=0.0, is_malicious=False):
+        """Add one vehicle per looping path in a single batch; return their ids.
+
+        `offsets` is None or an (n, 2) array, one offset per vehicle, as add().
+        """
+        n = len(paths)
+        lengths = np.fromiter(map(len, paths), dtype=np.int64, count=n)
+        if n and not lengths.min():
+            raise ValueError("vehicle path must contain at least one node")
+        nodes = np.fromiter(itertools.chain.from_iterable(paths), dtype=np.int64, count=int(lengths.sum()))
+        starts = np.cumsum(lengths) - lengths
+        first = self.size
+        self._grow(first + n)
+        ids = np.arange(first, first + n)
+        self.pos[ids] = self.node_xy[nodes[starts]]
+        if offsets is not None:
+            self.pos[ids] += offsets
+        self.speed[ids] = speed
+        self.path_start[ids] = self._path_total + starts
+        self.path_len[ids] = lengths
+        self.is_malicious[ids] = is_malicious
+        self._pending_paths.append(nodes)
+        self._path_total += len(nodes)
+        self.size += n
+        return ids
+
+    def flush_paths(self):
+        """Append paths added since the last step to path_nodes."""
+        if self._pending_paths:
+            self.path_nodes = np.concatenate([self.path_nodes] + self._pending_paths)
+            self._pending_paths = []
+
+    def step(self, dt, ids=None):
+        """Move every vehicle, or those in `ids`, speed * dt metres along its path, passing as many waypoints as needed.
+
+        Distance left over on reaching a waypoint carries on towards the next
+        one, so trajectories do not depend on the timestep.
+        """
+        self.flush_paths()
+        n = self.size
+        active = np.arange(n) if ids is None else np.asarray(ids, dtype=np.int64)
+        remaining = self.speed[:n] * dt
+        idle_hops = np.zeros(n, dtype=np.int32)  # Consecutive zero-length hops, to stop on degenerate paths
+        while len(active):
+            pos = self.pos[active]
+            goal = self.node_xy[self.path_nodes[self.path_start[active] + self.target[active]]]
+            delta = goal - pos
+            distance = np.hypot(delta[:, 0], delta[:, 1])
+            left = remaining[active]
+            moving = distance > left
+
+            # Vehicles that stop short of their target this tick
+            moved = active[moving]
+            self.pos[moved] = pos[moving] + delta[moving] * (left[moving] / distance[moving])[:, None]
+
+            # Vehicles reaching their target snap onto it and loop back at the end of the path
+            arrived = active[~moving]
+            self.pos[arrived] = goal[~moving]
+            remaining[arrived] -= distance[~moving]
+            target = self.target[arrived] + 1
+            target[target >= self.path_len[arrived]] = 0
+            self.target[arrived] = target
+            idle_hops[arrived] = np.where(distance[~moving] > 0, 0, idle_hops[arrived] + 1)
+            active = arrived[(remaining[arrived] > 0) & (idle_hops[arrived] < self.path_len[arrived])]
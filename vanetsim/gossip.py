@@ -0,0 +1,122 @@
+"""Gossip replication of key revocations between ledger RSUs.
+
+Each ledger RSU commits revocations to its own ledger. When a block
+commits, the RSU pushes only the revoked keys its neighbours have not had
+from it yet over backhaul links to the RSUs within ``link_range``; every
+RSU that learns a new key adopts it into its revoked index and passes it
+on, so revocations flood the RSU graph as deltas, never as whole ledgers.
+
+Links have a fixed latency and a bandwidth shared by the messages queued
+on them. The layer records how long each revocation takes to reach every
+RSU and how many packets from the revoked key are still accepted by RSUs
+that have not heard of it yet.
+"""
+from functools import partial
+
+import numpy as np
+
+from .ledger import REVOKE
+
+HEADER_BYTES = 64  # Per-message framing and signature
+KEY_BYTES = 40  # Per revoked key: key id, block hash reference and timestamp
+
+
+class GossipNetwork:
+    """Push gossip of committed revocations over RSU-to-RSU links, driven by the simulation's scheduler."""
+
+    def __init__(self, scheduler, rsus, latency=0.02, bandwidth=125000.0, link_range=1000.0):
+        self.scheduler = scheduler
+        self.rsus = [rsu for rsu in rsus if hasattr(rsu, 'ledger')]
+        self.latency = latency  # Seconds per hop
+        self.bandwidth = bandwidth  # Bytes per second per link
+        self.link_range = link_range  # Metres; None links every pair of RSUs
+        self.neighbours = self._links()  # RSU id -> list of neighbour RSUs
+        self.known = {rsu.rid: set() for rsu in self.rsus}  # RSU id -> revoked keys it has
+        self._link_free = {}  # (from id, to id) -> time the link finishes its current message
+        self._watching = {}  # RSU id -> time of its earliest scheduled ledger check
+
+        self.reach = {}  # Key -> number of RSUs that have it
+        self.committed_at = {}  # Key -> time of its first commit at any RSU
+        self.complete_at = {}  # Key -> time the last RSU learned it
+        self.learned_at = {}  # Key -> time an RSU last learned it, complete or not
+        self.messages = 0
+        self.bytes = 0
+        self.leaked = 0  # Packets accepted from keys already revoked elsewhere
+        for rsu in self.rsus:
+            rsu.gossip = self
+            rsu.ledger.on_commit = partial(self._committed, rsu)  # A partial, unlike a closure, can be checkpointed
+
+    def _links(self):
+        if not self.rsus:
+            return {}
+        xy = np.array([(rsu.x, rsu.y) for rsu in self.rsus], dtype=np.float64)
+        distance = np.hypot(xy[:, None, 0] - xy[None, :, 0], xy[:, None, 1] - xy[None, :, 1])
+        linked = distance <= (np.inf if self.link_range is None else self.link_range)
+        np.fill_diagonal(linked, False)
+        return {rsu.rid: [self.rsus[j] for j in np.flatnonzero(row)] for rsu, row in zip(self.rsus, linked)}
+
+    def watch(self, rsu):
+        """Make sure the RSU's ledger commits on time while a revocation is pending.
+
+        Ledgers otherwise only advance when a packet arrives, which would
+        delay replication until the next packet.
+        """
+        due = rsu.ledger.next_due
+        if rsu.ledger.revoking and due < self._watching.get(rsu.rid, float('inf')):
+            self._watching[rsu.rid] = due
+            self.scheduler.schedule(due, self._check, rsu)
+
+    def _check(self, rsu):
+        self._watching.pop(rsu.rid, None)
+        rsu.ledger.advance(self.scheduler.now)
+        self.watch(rsu)
+
+    def _committed(self, rsu, block):
+        keys = [key for kind, key, _ in block.transactions if kind == REVOKE]
+        for key in keys:
+            self.committed_at.setdefault(key, block.committed)
+        self._learn(rsu, keys, block.committed, source=None)
+
+    def _learn(self, rsu, keys, now, source):
+        """Record keys new to the RSU and forward them to its other neighbours."""
+        known = self.known[rsu.rid]
+        new = [key for key in keys if key not in known]
+        if not new:
+            return
+        known.update(new)
+        for key in new:
+            self.reach[key] = self.reach.get(key, 0) + 1
+            self.learned_at[key] = now
+            if self.reach[key] == len(self.rsus):
+                self.complete_at[key] = now
+        for peer in self.neighbours[rsu.rid]:
+            if peer is not source:
+                self._send(rsu, peer, new, now)
+
+    def _send(self, sender, receiver, keys, now):
+        size = HEADER_BYTES + KEY_BYTES * len(keys)
+        link = (sender.rid, receiver.rid)
+        start = max(now, self._link_free.get(link, 0.0))  # Wait for earlier messages on the link
+        done = start + size / self.bandwidth
+        self._link_free[link] = done
+        self.messages += 1
+        self.bytes += size
+        self.scheduler.schedule(done + self.latency, self._deliver, sender, receiver, keys)
+
+    def _deliver(self, sender, receiver, keys):
+        now = self.scheduler.now
+        for key in keys:
+            receiver.ledger.adopt(key, now)
+        self._learn(receiver, keys, now, source=sender)
+
+    def stats(self):
+        """Propagation times are from a key's first commit to the moment every RSU has it."""
+        times = [self.complete_at[key] - self.committed_at[key] for key in self.complete_at]
+        return {
+            'gossip_messages': self.messages,
+            'gossip_bytes': self.bytes,
+            'revocations_fully_propagated': len(times),
+            'mean_propagation_time': sum(times) / len(times) if times else 0.0,
+            'max_propagation_time': max(times, default=0.0),
+            'leaked_during_propagation': self.leaked,
+        }
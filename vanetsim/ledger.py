@@ -0,0 +1,212 @@
+"""Hash-chained key ledger for BRSUM RSUs, with batched block commits.
+
+Registrations and revocations are submitted as transactions and batched
+into blocks. A block is sealed once it holds ``block_size`` transactions or
+its first transaction has waited ``block_interval`` seconds, and takes
+effect ``commit_latency`` seconds after sealing, standing in for consensus.
+Each block stores the Merkle root of its transactions and the SHA-256 hash
+of the previous block, so ``verify`` can check the whole chain.
+
+Sealing is applied lazily: ``advance(now)`` commits every block due by
+``now`` with the timestamps it would have had, so the results are the same
+as sealing on a timer without scheduling any events. Committed revocations
+are kept in a set for O(1) checks on the packet hot path.
+
+A ledger attached to a ``LedgerStore`` writes committed blocks to disk
+instead of keeping them, and checks revocations through the store's cache.
+"""
+import hashlib
+
+from .store import RevokedKeys
+
+REGISTER = 'register'
+REVOKE = 'revoke'
+
+
+def merkle_root(leaves):
+    """Merkle root of a list of leaf hashes (bytes); the last leaf is paired with itself on odd levels."""
+    if not leaves:
+        return hashlib.sha256(b'').digest()
+    level = list(leaves)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+    return level[0]
+
+
+def transaction_hash(kind, key, time):
+    return hashlib.sha256(f"{kind}:{key}:{time!r}".encode()).digest()
+
+
+class Block:
+    """A sealed batch of (kind, key, submit time) transactions linked to its predecessor."""
+
+    def __init__(self, index, prev_hash, transactions, sealed, committed):
+        self.index = index
+        self.prev_hash = prev_hash
+        self.transactions = transactions
+        self.sealed = sealed  # Simulated time the block was sealed
+        self.committed = committed  # Simulated time its transactions took effect
+        self.merkle_root = merkle_root([transaction_hash(*tx) for tx in transactions])
+        self.hash = self.compute_hash()
+
+    def compute_hash(self):
+        header = f"{self.index}:{self.sealed!r}:".encode() + self.prev_hash + self.merkle_root
+        return hashlib.sha256(header).digest()
+
+
+class Ledger:
+    """Key registrations and revocations committed in hash-chained blocks."""
+
+    def __init__(self, block_size=32, block_interval=0.1, commit_latency=0.0):
+        self.block_size = block_size  # Transactions per block at most
+        self.block_interval = block_interval  # Seconds the oldest pending transaction may wait
+        self.commit_latency = commit_latency  # Seconds from sealing a block to it taking effect
+        self.blocks = []
+        self.pending = []  # Transactions not yet sealed into a block
+        self.sealed = []  # Blocks sealed but not yet committed, oldest first
+        self.registered = set()  # Keys with a committed or pending registration
+        self.revoked = set()  # Keys with a committed revocation
+        self.revoking = set()  # Keys with a revocation submitted but not yet committed
+        self.revocation_delays = []  # Seconds from submitting each revocation to its commit
+        self.adopted = 0  # Revocations learned from other RSUs instead of committed here
+        self.on_commit = None  # Called with each block as it commits, e.g. to replicate it
+        self.store = None  # LedgerStore holding committed blocks, when attached
+        self.rsu = None  # RSU id of this ledger in the store
+        self.block_count = 0
+        self.transaction_count = 0
+        self._head = bytes(32)  # Hash of the last committed block
+        self._due = float('inf')  # Earliest time advance() has work to do
+
+    def __len__(self):
+        return self.block_count
+
+    @property
+    def head(self):
+        """Hash of the last committed block."""
+        return self._head
+
+    def attach(self, store, rsu):
+        """Persist this ledger in `store` under RSU id `rsu`; blocks committed so far are written too."""
+        revoked = RevokedKeys(store, rsu)
+        for key in self.revoked:
+            revoked.add(key)
+        for block in self.blocks:
+            store.add_block(rsu, block)
+        self.store, self.rsu, self.revoked, self.blocks = store, rsu, revoked, []
+
+    @property
+    def next_due(self):
+        """Time of the next seal or commit, or inf when nothing is pending."""
+        return self._due
+
+    def is_revoked(self, key):
+        return key in self.revoked
+
+    def register(self, key, now):
+        """Submit a registration for a key seen for the first time."""
+        if key not in self.registered:
+            self.registered.add(key)
+            self._submit(REGISTER, key, now)
+
+    def revoke(self, key, now):
+        """Submit a revocation; it takes effect when its block commits."""
+        if key not in self.revoked and key not in self.revoking:
+            self.revoking.add(key)
+            self._submit(REVOKE, key, now)
+
+    def adopt(self, key, now=None):
+        """Apply a revocation already committed by another RSU's ledger, or preloaded from a past run."""
+        if key not in self.revoked:
+            self._mark_revoked(key, now, adopted=True)
+            self.adopted += 1
+
+    def _mark_revoked(self, key, time, adopted=False):
+        if self.store is None:
+            self.revoked.add(key)
+        else:
+            self.revoked.add(key, time, adopted)
+
+    def _submit(self, kind, key, now):
+        self.advance(now)
+        if not self.pending:
+            self._due = min(self._due, now + self.block_interval)
+        self.pending.append((kind, key, now))
+        if len(self.pending) >= self.block_size:
+            self._seal(now)
+
+    def _seal(self, time):
+        prev_hash = self.sealed[-1].hash if self.sealed else self.head
+        index = self.block_count + len(self.sealed)
+        self.sealed.append(Block(index, prev_hash, self.pending, time, time + self.commit_latency))
+        self.pending = []
+        self._schedule()
+
+    def _schedule(self):
+        deadlines = []
+        if self.pending:
+            deadlines.append(self.pending[0][2] + self.block_interval)
+        if self.sealed:
+            deadlines.append(self.sealed[0].committed)
+        self._due = min(deadlines, default=float('inf'))
+
+    def advance(self, now):
+        """Seal and commit every block due by `now`, in time order."""
+        while now >= self._due:
+            seal_at = self.pending[0][2] + self.block_interval if self.pending else float('inf')
+            if self.sealed and self.sealed[0].committed <= seal_at:
+                self._commit(self.sealed.pop(0))
+                self._schedule()
+            else:
+                self._seal(seal_at)
+
+    def _commit(self, block):
+        for kind, key, time in block.transactions:
+            if kind == REVOKE:
+                self.revoking.discard(key)
+                self._mark_revoked(key, block.committed)
+                self.revocation_delays.append(block.committed - time)
+        self.block_count += 1
+        self.transaction_count += len(block.transactions)
+        self._head = block.hash
+        if self.store is None:
+            self.blocks.append(block)
+        else:
+            self.store.add_block(self.rsu, block)
+        if self.on_commit is not None:
+            self.on_commit(block)
+
+    def verify(self):
+        """True if every committed block's hash, Merkle root and link to its predecessor check out."""
+        if self.store is not None:
+            return self._verify_stored()
+        prev_hash = bytes(32)
+        for block in self.blocks:
+            root = merkle_root([transaction_hash(*tx) for tx in block.transactions])
+            if block.prev_hash != prev_hash or block.merkle_root != root or block.hash != block.compute_hash():
+                return False
+            prev_hash = block.hash
+        return True
+
+    def _verify_stored(self):
+        """Rebuild every stored block from its transactions and check it against the stored hashes."""
+        prev_hash = bytes(32)
+        count = 0
+        for index, stored_prev, transactions, sealed, committed, stored_hash in self.store.blocks(self.rsu):
+            block = Block(index, prev_hash, transactions, sealed, committed)
+            if index != count or stored_prev != prev_hash or block.hash != stored_hash:
+                return False
+            prev_hash = stored_hash
+            count += 1
+        return count == self.block_count
+
+    def stats(self):
+        delays = self.revocation_delays
+        return {
+            'blocks': self.block_count,
+            'transactions': self.transaction_count,
+            'revocations': len(delays),
+            'mean_revocation_delay': sum(delays) / len(delays) if delays else 0.0,
+            'max_revocation_delay': max(delays, default=0.0),
+        }
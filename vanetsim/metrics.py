@@ -0,0 +1,219 @@
+"""Per-tick time series of packet, queue and revocation counters, streamed to disk while a run goes on.
+
+Every `interval` ticks the recorder reads the simulation's cumulative
+counters and stores what changed since the previous sample in one row of
+preallocated column arrays; ``close(sim)`` adds a last, shorter row for the
+ticks after the final multiple of `interval`, so the count columns sum to
+the run's totals. A full buffer is appended to the output and
+reused, so memory stays bounded however long the run:
+
+- a path ending in ``.csv`` gets rows appended to one CSV file, header first;
+- any other path is a directory of ``chunk_NNNNN.npz`` files, one array per
+  column, next to a ``meta.json`` written up front so that the chunks of an
+  interrupted run can still be read.
+
+``MetricsReader`` reads either back a chunk at a time, or one column at a
+time, without loading the rest.
+"""
+import csv
+import glob
+import json
+import os
+
+import numpy as np
+
+CHUNK_ROWS = 4096  # Samples buffered before they are written out
+FORMAT_VERSION = 1
+
+# Column name -> dtype. Counts are per sample; queue_depth and rsus_down are levels at the sample
+COLUMNS = {
+    'tick': np.int64,
+    'time': np.float64,
+    'legitimate_sent': np.int64,
+    'malicious_sent': np.int64,
+    'legitimate_accepted': np.int64,
+    'malicious_accepted': np.int64,
+    'legitimate_dropped': np.int64,  # Sent but neither accepted nor waiting in an RSU queue
+    'malicious_dropped': np.int64,
+    'queue_depth': np.int64,  # Packets waiting in every queueing RSU
+    'rsus_down': np.int64,
+    'revocations': np.int64,  # Revocations committed to a ledger
+    'revocation_delay': np.float64,  # Mean detection-to-commit delay of those revocations, seconds
+    'blocked': np.int64,  # Packets refused because of a revoked key
+}
+_COUNTS = ('legitimate_sent', 'malicious_sent', 'legitimate_accepted', 'malicious_accepted', 'legitimate_dropped',
+           'malicious_dropped', 'revocations', 'blocked')
+
+
+class MetricsRecorder:
+    """Samples a simulation's counters into preallocated columns and appends them to `path` chunk by chunk."""
+
+    def __init__(self, path, dt, interval=1, chunk_rows=CHUNK_ROWS):
+        self.path = path
+        self.dt = dt
+        self.interval = interval  # Ticks per sample
+        self.chunk_rows = chunk_rows
+        self.csv = path.endswith('.csv')
+        self.rows = 0  # Samples taken
+        self.chunks = 0  # Chunks written
+        self._columns = {name: np.zeros(chunk_rows, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._row = 0
+        self._sampled = 0  # Tick of the previous sample
+        self._previous = dict.fromkeys(_COUNTS, 0)  # Cumulative counts at the previous sample
+        self._delays_seen = {}  # RSU id -> revocation delays already reported
+        if self.csv:
+            with open(path, 'w', newline='') as f:
+                csv.writer(f).writerow(COLUMNS)
+        else:
+            os.makedirs(path, exist_ok=True)
+            meta = {'version': FORMAT_VERSION, 'dt': dt, 'interval': interval, 'columns': list(COLUMNS)}
+            with open(os.path.join(path, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+
+    def baseline(self, sim):
+        """Count from the simulation's totals so far, e.g. when it was restored from a checkpoint."""
+        self._previous = self._totals(sim)
+        self._sampled = sim.tick
+
+    def sample(self, sim):
+        """Record the counters of the tick just simulated, every `interval` ticks."""
+        if sim.tick % self.interval:
+            return
+        self._record(sim)
+
+    def _record(self, sim):
+        """One row with the counts since the previous sample."""
+        totals = self._totals(sim)
+        row, columns = self._row, self._columns
+        columns['tick'][row] = sim.tick
+        columns['time'][row] = sim.now
+        for name in _COUNTS:
+            columns[name][row] = totals[name] - self._previous[name]
+        columns['queue_depth'][row] = totals['queue_depth']
+        columns['rsus_down'][row] = totals['rsus_down']
+        delays = totals['new_delays']
+        columns['revocation_delay'][row] = sum(delays) / len(delays) if delays else 0.0
+        self._previous = totals
+        self._sampled = sim.tick
+        self._row += 1
+        self.rows += 1
+        if self._row == self.chunk_rows:
+            self.flush()
+
+    def _totals(self, sim):
+        """Cumulative counts, current levels and the revocation delays committed since the last call."""
+        now = sim.now
+        n = len(sim.fleet)
+        malicious = sim.fleet.is_malicious[:n]
+        sent, received = sim.fleet.sent[:n], sim.fleet.received[:n]
+        totals = {'malicious_sent': int(sent[malicious].sum()), 'malicious_accepted': int(received[malicious].sum())}
+        totals['legitimate_sent'] = int(sent.sum()) - totals['malicious_sent']
+        totals['legitimate_accepted'] = int(received.sum()) - totals['malicious_accepted']
+        queued = [0, 0]  # Packets waiting per class of sender, legitimate first
+        depth = down = revocations = blocked = 0
+        delays = []
+        for rsu in sim.rsus:
+            if hasattr(rsu, 'service_time'):
+                rsu.advance(now)  # Serve what finished by now, as finish() does
+                depth += rsu.size
+                for cls in (0, 1):
+                    queued[cls] += rsu.arrived[cls] - rsu.served[cls] - rsu.dropped[cls]
+            if hasattr(rsu, 'ledger'):
+                rsu.ledger.advance(now)  # Commit blocks that fell due
+                committed = rsu.ledger.revocation_delays
+                delays += committed[self._delays_seen.get(rsu.rid, 0):]
+                self._delays_seen[rsu.rid] = len(committed)
+                revocations += len(committed)
+                blocked += rsu.blocked
+            down += not rsu.operational
+        totals['legitimate_dropped'] = totals['legitimate_sent'] - totals['legitimate_accepted'] - queued[0]
+        totals['malicious_dropped'] = totals['malicious_sent'] - totals['malicious_accepted'] - queued[1]
+        totals.update(revocations=revocations, blocked=blocked, queue_depth=depth, rsus_down=down,
+                      new_delays=delays)
+        return totals
+
+    def flush(self):
+        """Append the buffered samples to the output."""
+        rows = self._row
+        if not rows:
+            return
+        if self.csv:
+            with open(self.path, 'a', newline='') as f:
+                csv.writer(f).writerows(zip(*(column[:rows].tolist() for column in self._columns.values())))
+        else:
+            np.savez(os.path.join(self.path, f'chunk_{self.chunks:05d}.npz'),
+                     **{name: column[:rows] for name, column in self._columns.items()})
+        self.chunks += 1
+        self._row = 0
+
+    def close(self, sim=None):
+        """Record the ticks of `sim` since the last sample, if any, and write everything out."""
+        if sim is not None and sim.tick > self._sampled:
+            self._record(sim)
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MetricsReader:
+    """Lazy access to a metrics file or directory written by MetricsRecorder."""
+
+    def __init__(self, path, chunk_rows=CHUNK_ROWS):
+        self.path = path
+        self.chunk_rows = chunk_rows  # Rows per chunk read from a CSV file
+        self.csv = path.endswith('.csv')
+        if self.csv:
+            with open(path, newline='') as f:
+                self.columns = next(csv.reader(f))
+            self.dt = self.interval = None
+        else:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+            if meta.get('version') != FORMAT_VERSION:
+                raise ValueError(f"unsupported metrics format in {path}")
+            self.columns = meta['columns']
+            self.dt = meta['dt']
+            self.interval = meta['interval']
+            self.files = sorted(glob.glob(os.path.join(path, 'chunk_*.npz')))
+
+    def chunks(self, columns=None):
+        """Yield {column: array} a chunk at a time, for the given columns or all of them."""
+        names = list(columns or self.columns)
+        unknown = set(names) - set(self.columns)
+        if unknown:
+            raise KeyError(f"no metrics column {sorted(unknown)[0]!r}")
+        if not self.csv:
+            for file in self.files:
+                with np.load(file) as chunk:
+                    yield {name: chunk[name] for name in names}  # Each array is read only when asked for
+            return
+        index = [self.columns.index(name) for name in names]
+        dtypes = [COLUMNS.get(name, np.float64) for name in names]
+        with open(self.path, newline='') as f:
+            reader = csv.reader(f)
+            next(reader)
+            while True:
+                rows = [row for _, row in zip(range(self.chunk_rows), reader)]
+                if not rows:
+                    return
+                yield {name: np.array([row[i] for row in rows], dtype=np.float64).astype(dtype)
+                       for name, i, dtype in zip(names, index, dtypes)}
+
+    def column(self, name):
+        """One column over the whole run."""
+        parts = [chunk[name] for chunk in self.chunks([name])]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=COLUMNS.get(name, np.float64))
+
+    def load(self, columns=None):
+        """{column: array} over the whole run, for the given columns or all of them."""
+        names = list(columns or self.columns)
+        parts = {name: [] for name in names}
+        for chunk in self.chunks(names):
+            for name in names:
+                parts[name].append(chunk[name])
+        return {name: np.concatenate(arrays) if arrays else np.zeros(0, dtype=COLUMNS.get(name, np.float64))
+                for name, arrays in parts.items()}
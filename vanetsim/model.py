@@ -0,0 +1,201 @@
+"""Vehicles and RSUs for the headless simulation, free of pygame and wall-clock time."""
+import math
+
+from .detection import TokenBucket
+from .eventlog import ACCEPT, BLOCK, DROP, NULL_LOG, REVOKE, RSU_DOWN
+from .ledger import Ledger
+
+DEFAULT_SPEED = 13.9  # Metres per second, 50 km/h urban driving
+
+
+class Vehicle:
+    """A vehicle looping over a path of road nodes and sending packets to RSUs.
+
+    Kinematic state and packet counters live in the simulation's VehicleStore;
+    the object holds only the per-vehicle protocol state and its row id.
+    """
+    send_interval = 0.05  # Simulated seconds between packet emissions
+
+    def __init__(self, fleet, path, offset=(0, 0), is_malicious=False, speed=DEFAULT_SPEED, vid=None):
+        self.fleet = fleet
+        if vid is None:
+            vid = fleet.add(path, offset, speed, is_malicious)
+        self.vid = vid  # Row in the store, unique within a simulation; given when added in bulk by add_many
+        self.path = path  # Predefined path of node indices
+        self.communication_error = False  # Flag for communication error with RSU
+        self.is_malicious = is_malicious  # Flag to identify malicious vehicles
+        self.revoked_by = set()  # Ids of the RSUs that have blocked this vehicle's key (BRSUM)
+        self.authenticated = False  # Flag for authentication status (BRSUM)
+        self.key = f"Key{self.vid}"  # Key used to identify the vehicle to the ledger
+        self.active = True  # False while a mobility trace has the vehicle off the map; it sends nothing
+
+    @property
+    def x(self):
+        return float(self.fleet.pos[self.vid, 0])
+
+    @property
+    def y(self):
+        return float(self.fleet.pos[self.vid, 1])
+
+    @property
+    def current_target_index(self):
+        return int(self.fleet.target[self.vid])
+
+    @property
+    def sent_packets(self):
+        return int(self.fleet.sent[self.vid])
+
+    @sent_packets.setter
+    def sent_packets(self, value):
+        self.fleet.sent[self.vid] = value
+
+    @property
+    def received_packets(self):
+        return int(self.fleet.received[self.vid])
+
+    @received_packets.setter
+    def received_packets(self, value):
+        self.fleet.received[self.vid] = value
+
+    def distance_to(self, rsu):
+        """Calculate distance to the RSU."""
+        return math.sqrt((self.x - rsu.x) ** 2 + (self.y - rsu.y) ** 2)
+
+    @property
+    def revoked(self):
+        """True once any RSU has blocked the key."""
+        return bool(self.revoked_by)
+
+    def send_packet(self, rsu, now):
+        """Send a packet to the RSU; the engine schedules when this happens."""
+        if rsu.rid in self.revoked_by:
+            return
+        self.authenticated = True  # First packet authenticates the key
+        self.fleet.sent[self.vid] += 1
+        rsu.receive_message(self, now)
+
+    def revoke_key(self, rid):
+        """Record that RSU `rid` revoked the key; the vehicle stops sending to it.
+
+        Other RSUs keep accepting the key until their own ledger revokes it.
+        """
+        self.revoked_by.add(rid)
+
+
+class LegitimateVehicle(Vehicle):
+    """Vehicle sending normal traffic every 0.05 simulated seconds."""
+    send_interval = 0.05
+
+    def __init__(self, fleet, path, offset=(0, 0), speed=DEFAULT_SPEED, vid=None):
+        super().__init__(fleet, path, offset, is_malicious=False, speed=speed, vid=vid)
+
+
+class MaliciousVehicle(Vehicle):
+    """Vehicle flooding the RSU every 0.0001 simulated seconds."""
+    send_interval = 0.0001
+
+    def __init__(self, fleet, path, offset=(0, 0), speed=DEFAULT_SPEED, vid=None):
+        super().__init__(fleet, path, offset, is_malicious=True, speed=speed, vid=vid)
+
+
+class RSU:
+    """RSU that goes offline for good once it has handled max_messages packets."""
+
+    def __init__(self, rid, x, y, comm_range=300, max_messages=2500):
+        self.rid = rid  # Integer id, unique within a simulation
+        self.x = x  # World position in metres
+        self.y = y
+        self.comm_range = comm_range  # Communication range in metres
+        self.message_count = 0  # Track message count
+        self.max_messages = max_messages  # Threshold for RSU capacity
+        self.operational = True  # RSU operational status
+        self.malicious_received = 0  # Count of malicious messages received
+        self.legitimate_received = 0  # Count of legitimate messages received
+        self.log = NULL_LOG  # Replaced by the simulation's event log
+
+    def receive_message(self, vehicle, now):
+        """Handle an incoming message from a vehicle."""
+        if not self.operational:
+            if self.log.packets:
+                self.log.event(DROP, vehicle.vid, self.rid)
+            return
+        self.message_count += 1
+        vehicle.fleet.received[vehicle.vid] += 1
+        if vehicle.is_malicious:
+            self.malicious_received += 1
+        else:
+            self.legitimate_received += 1
+        if self.log.packets:
+            self.log.event(ACCEPT, vehicle.vid, self.rid)
+
+        # Check if RSU exceeds message capacity
+        if self.message_count > self.max_messages:
+            self.operational = False
+            self.log.event(RSU_DOWN, vehicle.vid, self.rid)
+
+    def accepts(self, vehicle):
+        """Return True if a packet from the vehicle would currently be processed."""
+        return self.operational
+
+    def reset(self):
+        """Reset RSU to initial state."""
+        self.message_count = 0
+        self.operational = True
+
+
+class LedgerRSU:
+    """BRSUM RSU that revokes, through its ledger, the key of any vehicle its rate detector flags.
+
+    The detector (see vanetsim.detection) defaults to a token bucket
+    allowing bursts of 50 packets, the original threshold. A revocation only
+    blocks the key once its ledger block commits; packets accepted from the
+    key until then are counted as leaked.
+    """
+
+    def __init__(self, rid, x, y, comm_range=300, detector=None, ledger=None):
+        self.rid = rid
+        self.x = x  # World position in metres
+        self.y = y
+        self.comm_range = comm_range  # Communication range in metres
+        self.detector = detector if detector is not None else TokenBucket()
+        self.ledger = ledger if ledger is not None else Ledger()
+        self.operational = True  # The ledger RSU never goes offline
+        self.blocked = 0  # Count of packets dropped because of a revoked key
+        self.leaked = 0  # Count of packets accepted while the sender's revocation was pending
+        self.log = NULL_LOG  # Replaced by the simulation's event log
+        self.gossip = None  # GossipNetwork replicating revocations, if any
+
+    def receive_message(self, vehicle, now):
+        """Receive and process a message, revoking keys of detected attackers."""
+        ledger = self.ledger
+        ledger.advance(now)
+        key = vehicle.key
+        if key in ledger.revoked:
+            vehicle.revoke_key(self.rid)  # The vehicle learns its key is no longer valid here
+            self.blocked += 1
+            if self.log.packets:
+                self.log.event(BLOCK, vehicle.vid, self.rid)
+            return  # Block packet if key is revoked
+        if key not in ledger.registered:
+            ledger.register(key, now)  # Register the vehicle for the first time
+            if self.gossip is not None:
+                self.gossip.watch(self)  # The new transaction may seal a pending revocation sooner
+
+        vehicle.fleet.received[vehicle.vid] += 1
+        if self.log.packets:
+            self.log.event(ACCEPT, vehicle.vid, self.rid)
+
+        if key in ledger.revoking:
+            self.leaked += 1  # Already detected, waiting for the block to commit
+        elif self.gossip is not None and key in self.gossip.committed_at:
+            self.gossip.leaked += 1  # Revoked elsewhere, not replicated here yet
+        elif self.detector.observe(vehicle.vid, now):
+            ledger.revoke(key, now)
+            self.detector.forget(vehicle.vid)  # The ledger decides from now on
+            self.log.event(REVOKE, vehicle.vid, self.rid)
+            if self.gossip is not None:
+                self.gossip.watch(self)
+
+    def accepts(self, vehicle):
+        """Return True if the vehicle's key is not revoked."""
+        return vehicle.key not in self.ledger.revoked
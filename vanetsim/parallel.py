@@ -0,0 +1,514 @@
+"""One scenario split into spatial regions, each simulated by its own worker process.
+
+    python -m vanetsim.parallel city --osm map.osm --workers 8 --set vehicles=5000
+
+The map is cut into strips along its wider axis, with as many road
+waypoints of the fleet's paths in each strip. Every worker restores the
+same checkpoint of the built scenario, so it holds a replica of all
+vehicles and RSUs, but it only moves the vehicles currently in its strip
+and only runs the RSUs located in it. Vehicle positions, path progress and
+RSU status live in ``multiprocessing.shared_memory`` arrays that every
+worker reads; packet counters have one row per worker.
+
+Ticks are synchronised with a barrier. During a tick each worker runs the
+packet events of its own vehicles and RSUs and posts everything bound for
+another region to its mailbox, a shared array of fixed-size messages:
+packets for an RSU in another strip, a vehicle's next emission once it has
+crossed into another strip (with its authentication and revocation
+state), revocation notices, and ledger gossip between RSUs. After the
+barrier each worker collects the messages addressed to it and moves its
+vehicles, and a second barrier publishes the new positions.
+
+Messages take effect at the start of the next tick, so compared with one
+process, packets to an RSU across a boundary arrive up to one tick late
+and a vehicle crossing a boundary pauses for up to one tick; whatever is
+still in a mailbox after the last tick is delivered before reporting,
+without emitting or posting anything further. A vehicle only hears of a
+revocation a tick late, so packets reaching an RSU that has already
+blocked it are taken back rather than counted as sent. Mobility
+sources (trajectory replay, traces) and ledger stores are not supported.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from functools import partial
+from multiprocessing import shared_memory
+from queue import Empty
+from threading import BrokenBarrierError
+from types import SimpleNamespace
+
+import numpy as np
+
+from .checkpoint import restore_checkpoint, save_checkpoint
+from .engine import Simulation
+from .eventlog import QUIET, EventLog
+from .gossip import GossipNetwork
+from .queueing import queue_stats
+from .roads import DEFAULT_OSM_FILE, RoadNetwork, load_road_network
+from .scenarios import SCENARIOS
+from .sweep import nest
+
+MAILBOX = 1 << 16  # Messages a worker may post per tick
+POLL = 1.0  # Seconds between checks that the workers are still alive
+
+# Message kinds
+PACKET = 0  # a: vehicle, b: RSU, time: sent
+EMIT = 1  # a: vehicle, c: flags, time: next emission due
+REVOKED = 2  # a: vehicle, b: RSU that revoked its key
+GOSSIP = 3  # a: sender RSU, b: receiver RSU, c: vehicle of the key, time: delivery, value: first commit
+MESSAGE = np.dtype([('dest', '<i4'), ('kind', 'u1'), ('a', '<i8'), ('b', '<i8'), ('c', '<i8'), ('time', '<f8'),
+                    ('value', '<f8')])
+AUTHENTICATED = 1
+COMMUNICATION_ERROR = 2
+
+
+def split(sim, count):
+    """(axis, cuts) dividing the map into `count` strips with as many path waypoints in each."""
+    fleet = sim.fleet
+    fleet.flush_paths()
+    xy = fleet.node_xy[fleet.path_nodes] if len(fleet.path_nodes) else fleet.node_xy
+    axis = int(np.argmax(np.ptp(fleet.node_xy, axis=0)))
+    cuts = np.quantile(xy[:, axis], np.arange(1, count) / count)
+    return axis, cuts
+
+
+def _create(shape, dtype):
+    """A zeroed array in a new shared memory block; returns (block, array, spec for _attach)."""
+    dtype = np.dtype(dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    array[...] = 0
+    return block, array, (block.name, shape, dtype)
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+class _Region:
+    """One worker's view: a replica simulation running the vehicles and RSUs of its strip."""
+
+    def __init__(self, index, sim, axis, cuts, shared, barrier):
+        self.index = index
+        self.sim = sim
+        self.axis = axis
+        self.cuts = cuts
+        self.barrier = barrier
+        self.blocks = []
+        arrays = {}
+        for name, spec in shared.items():
+            block, arrays[name] = _attach(spec)
+            self.blocks.append(block)  # Kept open while the arrays are in use
+        fleet = sim.fleet
+        n = fleet.size
+        fleet.pos = arrays['pos']  # Shared: every worker reads them, owners write their own rows
+        fleet.target = arrays['target']
+        fleet.sent = arrays['sent'][index]  # One row per worker, summed at the end
+        fleet.received = arrays['received'][index]
+        self.rsu_down = arrays['rsu_down']
+        self.outboxes = arrays['outbox']
+        self.outbox = self.outboxes[index]
+        self.counts = arrays['counts']
+        self.posted = 0
+        self.deferred = []  # Messages to post at the start of the next tick
+        self.overdue = []  # (callback, args) collected on the last tick, run by drain()
+
+        self.vehicles = sim.vehicles[:n]
+        self.key_vid = {vehicle.key: vehicle.vid for vehicle in self.vehicles}
+        self.rsu_owner = self.region_of(np.array([(rsu.x, rsu.y) for rsu in sim.rsus]).reshape(-1, 2))
+        self.owned_rsus = [rsu for rsu, owner in zip(sim.rsus, self.rsu_owner) if owner == index]
+        self.rsus = {rsu.rid: rsu for rsu in sim.rsus}
+        self.rsu_index = {rsu.rid: i for i, rsu in enumerate(sim.rsus)}
+        for rsu, owner in zip(sim.rsus, self.rsu_owner):
+            if owner != index:
+                rsu.receive_message = partial(self._forward_packet, rsu)  # Replicas only pass packets on
+        self.notified = set()  # (vehicle, RSU) revocations already reported to the vehicle's owner
+        self.owned = None
+        self.update_owners()
+
+        # Run emissions and gossip through this region, and keep only the pending events it owns
+        sim._emit = self._emit
+        if sim.gossip is not None:
+            sim.gossip._deliver = self._deliver_gossip
+        queue = []
+        for time_, sequence, callback, args in sim.scheduler._queue:
+            name = getattr(callback, '__name__', '')
+            if name == '_emit':
+                if self.owner[args[0].vid] != index:
+                    continue
+                callback = self._emit
+            elif name == '_deliver':
+                if self.rsu_owner[self.rsu_index[args[1].rid]] != index:
+                    continue
+                callback = self._deliver_gossip
+            elif name == '_check' and self.rsu_owner[self.rsu_index[args[0].rid]] != index:
+                continue
+            queue.append((time_, sequence, callback, args))
+        sim.scheduler._queue = sorted(queue, key=lambda event: event[:2])  # A sorted list is a valid heap
+
+    def region_of(self, xy):
+        return np.searchsorted(self.cuts, xy[:, self.axis], side='right')
+
+    def update_owners(self):
+        """Assign every vehicle to the strip it is in; revocations known here follow the ones that left."""
+        self.owner = self.region_of(self.sim.fleet.pos[:len(self.vehicles)])
+        owned = np.flatnonzero(self.owner == self.index)
+        if self.owned is not None:
+            for vid in np.setdiff1d(self.owned, owned, assume_unique=True).tolist():
+                for rid in sorted(self.vehicles[vid].revoked_by):
+                    self.deferred.append((int(self.owner[vid]), REVOKED, vid, rid))
+        self.owned = owned
+
+    def post(self, dest, kind, a=0, b=0, c=0, time_=0.0, value=0.0):
+        if self.posted == len(self.outbox):
+            raise RuntimeError(f"region {self.index} posted more than {len(self.outbox)} messages in one tick; "
+                               "raise the mailbox size")
+        self.outbox[self.posted] = (dest, kind, a, b, c, time_, value)
+        self.posted += 1
+
+    # Hooks standing in for the replica's own methods
+
+    def _emit(self, vehicle):
+        if self.owner[vehicle.vid] == self.index:
+            Simulation._emit(self.sim, vehicle)
+            return
+        # The vehicle has left the strip: its emissions carry on where it is now, and this one is counted there
+        self.sim.scheduler.processed -= 1
+        dest = int(self.owner[vehicle.vid])
+        flags = AUTHENTICATED * vehicle.authenticated | COMMUNICATION_ERROR * vehicle.communication_error
+        self.post(dest, EMIT, vehicle.vid, c=flags, time_=self.sim.scheduler.now)
+        for rid in sorted(vehicle.revoked_by):
+            self.post(dest, REVOKED, vehicle.vid, rid)
+
+    def _forward_packet(self, rsu, vehicle, now):
+        self.post(int(self.rsu_owner[self.rsu_index[rsu.rid]]), PACKET, vehicle.vid, rsu.rid, time_=now)
+
+    def _receive(self, rsu, vehicle, notify=True):
+        """A packet from another region reaching one of this region's RSUs."""
+        sim = self.sim
+        sim.scheduler.processed -= 1  # Part of the sender's emission event, as in one process
+        if rsu.rid in vehicle.revoked_by:
+            # In one process the vehicle stops sending here once it has been blocked; its region only hears
+            # of it a tick later, so the packets it sent meanwhile are taken back rather than blocked, and so are
+            # the emission events they came from
+            sim.fleet.sent[vehicle.vid] -= 1
+            sim.scheduler.processed -= 1
+            return
+        rsu.receive_message(vehicle, sim.scheduler.now)
+        if notify and rsu.rid in vehicle.revoked_by and (vehicle.vid, rsu.rid) not in self.notified:
+            self.notified.add((vehicle.vid, rsu.rid))
+            self.post(int(self.owner[vehicle.vid]), REVOKED, vehicle.vid, rsu.rid)
+
+    def _deliver_gossip(self, sender, receiver, keys):
+        owner = self.rsu_owner[self.rsu_index[receiver.rid]]
+        if owner == self.index:
+            GossipNetwork._deliver(self.sim.gossip, sender, receiver, keys)
+            return
+        self.sim.scheduler.processed -= 1  # Delivered in the receiver's region, and counted there
+        committed_at = self.sim.gossip.committed_at
+        for key in keys:
+            self.post(int(owner), GOSSIP, sender.rid, receiver.rid, self.key_vid[key], self.sim.scheduler.now,
+                      committed_at.get(key, self.sim.scheduler.now))
+
+    def collect(self, final=False):
+        """Act on the messages other regions posted for this one during the tick.
+
+        On the final tick, packets and gossip sent before the end are kept
+        for drain() instead, as no tick is left to run them in.
+        """
+        sim = self.sim
+        now = sim.now  # Start of the next tick; everything lands no earlier, keeping RSU clocks monotonic
+
+        def schedule(time_, callback, *args):
+            if final and time_ < now and callback != self._emit:
+                self.overdue.append((callback, args))
+            else:
+                sim.scheduler.schedule(max(time_, now), callback, *args)
+
+        counts = self.counts.tolist()
+        inbox = np.concatenate([box[:count] for box, count in zip(self.outboxes, counts)])
+        inbox = inbox[inbox['dest'] == self.index]
+        inbox = inbox[np.argsort(inbox['time'], kind='stable')]
+        gossip = []
+        for kind, a, b, c, time_, value in zip(inbox['kind'].tolist(), inbox['a'].tolist(), inbox['b'].tolist(),
+                                               inbox['c'].tolist(), inbox['time'].tolist(), inbox['value'].tolist()):
+            if kind == PACKET:
+                schedule(time_, self._receive, self.rsus[b], self.vehicles[a])
+            elif kind == EMIT:
+                vehicle = self.vehicles[a]
+                vehicle.authenticated = vehicle.authenticated or bool(c & AUTHENTICATED)
+                vehicle.communication_error = vehicle.communication_error or bool(c & COMMUNICATION_ERROR)
+                schedule(time_, self._emit, vehicle)
+            elif kind == REVOKED:
+                self.vehicles[a].revoke_key(b)
+            elif kind == GOSSIP:
+                gossip.append((a, b, time_, self.vehicles[c].key, value))
+        # Keys sent together are delivered together
+        message = None
+        for sender, receiver, time_, key, committed in gossip:
+            sim.gossip.committed_at.setdefault(key, committed)
+            if message is None or message[:3] != (sender, receiver, time_):
+                message = (sender, receiver, time_, [])
+                schedule(time_, self._deliver_gossip, self.rsus[sender], self.rsus[receiver], message[3])
+            message[3].append(key)
+
+        for rsu, down in zip(sim.rsus, self.rsu_down.tolist()):
+            if self.rsu_owner[self.rsu_index[rsu.rid]] != self.index:
+                rsu.operational = not down
+
+    def run(self, end_tick):
+        sim = self.sim
+        dt = sim.dt
+        while sim.tick < end_tick:
+            for message in self.deferred:
+                self.post(*message)
+            self.deferred = []
+            sim.scheduler.run_until((sim.tick + 1) * dt)
+            sim.tick += 1
+            sim.log.tick = sim.tick
+            for rsu in self.owned_rsus:
+                self.rsu_down[self.rsu_index[rsu.rid]] = not rsu.operational
+            self.counts[self.index] = self.posted
+            self.barrier.wait()  # Every mailbox is complete
+            self.collect(final=sim.tick == end_tick)
+            sim.fleet.step(dt, self.owned)
+            sim._association = None
+            self.barrier.wait()  # Every mailbox is read and every position written
+            self.posted = 0
+            self.update_owners()
+        self.drain()
+        sim.log.flush()
+
+    def drain(self):
+        """Deliver what reached this region on the final tick, so that no packet sent before the end is lost.
+
+        Nothing is emitted or posted: the run ends at the final tick.
+        """
+        scheduler = self.sim.scheduler
+        for callback, args in self.overdue:
+            scheduler.processed += 1
+            if callback == self._receive:
+                self._receive(*args, notify=False)
+            else:
+                callback(*args)
+        self.overdue = []
+
+    def result(self):
+        """This region's share of the report, for merge()."""
+        sim = self.sim
+        ledgers = [rsu for rsu in self.owned_rsus if hasattr(rsu, 'ledger')]
+        for rsu in ledgers:
+            rsu.ledger.advance(sim.now)
+        queues = [rsu for rsu in self.owned_rsus if hasattr(rsu, 'service_time')]
+        for rsu in queues:
+            rsu.advance(sim.now)
+        result = {
+            'ticks': sim.tick,
+            'events': sim.scheduler.processed,
+            'ledgers': len(ledgers),
+            'blocked': sum(rsu.blocked for rsu in ledgers),
+            'leaked': sum(rsu.leaked for rsu in ledgers),
+            'blocks': sum(len(rsu.ledger) for rsu in ledgers),
+            'delays': [delay for rsu in ledgers for delay in rsu.ledger.revocation_delays],
+            'revoked': [v.vid for v in self.vehicles if v.revoked_by and not v.is_malicious],
+            'queues': [{name: getattr(rsu, name) for name in ('max_size', 'arrived', 'served', 'dropped',
+                                                               'latency_total', 'latency_max')} for rsu in queues],
+        }
+        gossip = sim.gossip
+        if gossip is not None:
+            result['gossip'] = {'rsus': len(gossip.rsus), 'messages': gossip.messages, 'bytes': gossip.bytes,
+                                'leaked': gossip.leaked, 'reach': gossip.reach, 'committed_at': gossip.committed_at,
+                                'learned_at': gossip.learned_at}
+        return result
+
+
+def _worker(index, checkpoint, source, axis, cuts, shared, barrier, results, end_tick, log_path):
+    try:
+        network = RoadNetwork.load(source) if isinstance(source, str) else source
+        log = EventLog(f'{log_path}.{index}') if log_path else EventLog(level=QUIET)
+        with log:
+            sim = restore_checkpoint(checkpoint, network, log)
+            region = _Region(index, sim, axis, cuts, shared, barrier)
+            region.run(end_tick)
+        results.put((index, region.result()))
+    except BaseException as error:
+        barrier.abort()  # Release the other workers instead of leaving them waiting
+        results.put((index, error))
+
+
+def _collect(processes, results):
+    """Each worker's (index, result), raising as soon as one exits without reporting."""
+    collected = {}
+    while len(collected) < len(processes):
+        try:
+            index, result = results.get(timeout=POLL)
+        except Empty:
+            if all(process.exitcode is None for process in processes):
+                continue
+        else:
+            collected[index] = result
+            continue
+        try:  # A worker that reported just before exiting may have its result still in the pipe
+            while True:
+                index, result = results.get(timeout=POLL)
+                collected[index] = result
+        except Empty:
+            pass
+        dead = [(index, process.exitcode) for index, process in enumerate(processes)
+                if index not in collected and process.exitcode is not None]
+        if dead:
+            # The others are terminated by the caller; aborting the barrier could block on a lock the dead one held
+            index, code = dead[0]
+            raise RuntimeError(f"region {index} exited with code {code} before reporting")
+    return collected
+
+
+def run_partitioned(network, scenario, workers=None, duration=10.0, dt=0.01, mailbox=MAILBOX, log_path=None,
+                    **options):
+    """Build `scenario` with `options` and run it split over `workers` regions; returns the merged report.
+
+    With log_path set, region i writes its event log to log_path.i.
+    """
+    workers = workers or os.cpu_count()
+    sim = SCENARIOS[scenario](network, dt=dt, log=EventLog(level=QUIET), **options)
+    if sim.mobility is not None:
+        raise ValueError("partitioned runs need live movement, not a trajectory or trace")
+    axis, cuts = split(sim, workers)
+    n, fleet = len(sim.fleet), sim.fleet
+    blocks, shared = [], {}
+
+    def array(name, shape, dtype):
+        block, values, shared[name] = _create(shape, dtype)
+        blocks.append(block)
+        return values
+
+    try:
+        array('pos', (n, 2), np.float64)[:] = fleet.pos[:n]
+        array('target', (n,), np.int32)[:] = fleet.target[:n]
+        array('sent', (workers, n), np.int64)[0] = fleet.sent[:n]
+        array('received', (workers, n), np.int64)[0] = fleet.received[:n]
+        array('rsu_down', (len(sim.rsus),), bool)[:] = [not rsu.operational for rsu in sim.rsus]
+        array('outbox', (workers, mailbox), MESSAGE)
+        array('counts', (workers,), np.int64)
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, 'start.ckpt')
+            save_checkpoint(sim, checkpoint, network)  # Every region restores the same built scenario
+            source = network.cache_dir or network  # Workers memory-map the cached arrays when there are any
+            end_tick = round(duration / dt)
+            processes = [context.Process(target=_worker, args=(index, checkpoint, source, axis, cuts, shared,
+                                                                barrier, results, end_tick, log_path))
+                         for index in range(workers)]
+            try:
+                for process in processes:
+                    process.start()
+                collected = _collect(processes, results)
+            finally:
+                for process in processes:
+                    if process.is_alive():
+                        process.terminate()  # Only left running when another one died
+                    if process.pid is not None:
+                        process.join()
+        errors = [error for error in collected.values() if isinstance(error, BaseException)]
+        errors.sort(key=lambda error: isinstance(error, BrokenBarrierError))  # The cause before its knock-on effects
+        if errors:
+            raise RuntimeError(f"a region failed: {errors[0]!r}") from errors[0]
+        sent = np.ndarray((workers, n), dtype=np.int64, buffer=blocks[2].buf).copy()
+        received = np.ndarray((workers, n), dtype=np.int64, buffer=blocks[3].buf).copy()
+        return merge([collected[index] for index in range(workers)], sent, received, fleet.is_malicious[:n], dt)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def merge(results, sent, received, malicious, dt):
+    """Combine the regions' results into one report, with the keys of Simulation.report()."""
+    sent, received = sent.sum(axis=0), received.sum(axis=0)
+    report = {
+        'ticks': results[0]['ticks'],
+        'events': sum(result['events'] for result in results),
+        'simulated_time': results[0]['ticks'] * dt,
+        'malicious_sent': int(sent[malicious].sum()),
+        'malicious_received': int(received[malicious].sum()),
+        'legitimate_sent': int(sent[~malicious].sum()),
+        'legitimate_received': int(received[~malicious].sum()),
+    }
+    if any(result['ledgers'] for result in results):
+        delays = [delay for result in results for delay in result['delays']]
+        report.update({
+            'blocked': sum(result['blocked'] for result in results),
+            'leaked': sum(result['leaked'] for result in results),
+            'blocks': sum(result['blocks'] for result in results),
+            'revocations': len(delays),
+            'mean_revocation_delay': sum(delays) / len(delays) if delays else 0.0,
+            'legitimate_revoked': len(set().union(*(result['revoked'] for result in results))),
+        })
+    queues = [SimpleNamespace(**queue) for result in results for queue in result['queues']]
+    if queues:
+        report.update(queue_stats(queues))
+    gossips = [result['gossip'] for result in results if 'gossip' in result]
+    if gossips:
+        reach, committed_at, learned_at = {}, {}, {}
+        for gossip in gossips:
+            for key, count in gossip['reach'].items():
+                reach[key] = reach.get(key, 0) + count
+            for key, when in gossip['committed_at'].items():
+                committed_at[key] = min(when, committed_at.get(key, when))
+            for key, when in gossip['learned_at'].items():
+                learned_at[key] = max(when, learned_at.get(key, when))
+        times = [learned_at[key] - committed_at[key] for key, count in reach.items() if count == gossips[0]['rsus']]
+        report.update({
+            'gossip_messages': sum(gossip['messages'] for gossip in gossips),
+            'gossip_bytes': sum(gossip['bytes'] for gossip in gossips),
+            'revocations_fully_propagated': len(times),
+            'mean_propagation_time': sum(times) / len(times) if times else 0.0,
+            'max_propagation_time': max(times, default=0.0),
+            'leaked_during_propagation': sum(gossip['leaked'] for gossip in gossips),
+        })
+    return report
+
+
+def _option(text):
+    """Parse NAME=VALUE with a JSON value, falling back to a string."""
+    name, _, value = text.partition('=')
+    if not name or not value:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {text!r}")
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run one scenario split into spatial regions across CPU cores.')
+    parser.add_argument('scenario', choices=sorted(name for name in SCENARIOS if name != 'trace'))
+    parser.add_argument('--osm', default=DEFAULT_OSM_FILE, help='OSM road network file')
+    parser.add_argument('--workers', type=int, help='Regions, one worker process each (default: one per CPU)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Simulated seconds to run')
+    parser.add_argument('--dt', type=float, default=0.01, help='Simulated seconds per tick')
+    parser.add_argument('--set', type=_option, action='append', default=[], metavar='NAME=VALUE',
+                        help='Scenario option, e.g. vehicles=5000 or ledger.block_size=8; repeatable')
+    parser.add_argument('--mailbox', type=int, default=MAILBOX, help='Messages a region may post per tick')
+    parser.add_argument('--log', help='Event log path; region i writes LOG.i')
+    args = parser.parse_args(argv)
+
+    network = load_road_network(args.osm)
+    started = time.perf_counter()
+    report = run_partitioned(network, args.scenario, args.workers, args.duration, args.dt, args.mailbox, args.log,
+                             **nest(dict(args.set)))
+    elapsed = time.perf_counter() - started
+    for name, value in report.items():
+        print(f"{name}: {value}")
+    print(f"{args.workers or os.cpu_count()} regions, {elapsed:.1f} s wall clock")
+
+
+if __name__ == '__main__':
+    main()
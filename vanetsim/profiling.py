@@ -0,0 +1,148 @@
+"""Per-phase timing of the main loop, with optional cProfile and tracemalloc windows.
+
+``Profiler`` records wall time and call counts per phase and per tick
+into a fixed-size ring buffer of numpy rows, so it costs two
+``perf_counter`` calls and an array add per phase and its memory does not
+grow with the run. Whole-run totals are kept separately; the ring holds the
+most recent ticks for per-tick percentiles.
+
+Phases are named as they are first recorded. The simulation records
+``comms`` (packet events and RSU processing), ``association`` (vehicle to
+RSU lookup) and ``movement``; the viewer adds ``input``, ``sprites``,
+``overlay``, ``display`` and ``wait``, so one summary shows whether movement,
+communication or rendering dominates a scenario.
+
+A cProfile and/or tracemalloc capture can be limited to a window of ticks,
+keeping the run fast outside it.
+"""
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+
+import numpy as np
+
+MAX_PHASES = 16
+
+
+class Profiler:
+    """Ring buffer of per-tick phase timings plus whole-run totals."""
+
+    def __init__(self, capacity=4096, cprofile_window=None, tracemalloc_window=None):
+        self.capacity = capacity  # Ticks kept for per-tick percentiles
+        self.phases = []  # Phase names in order of first use, one column each
+        self._column = {}  # Phase name -> column
+        self.seconds = np.zeros((capacity, MAX_PHASES))  # Ring of per-tick wall time
+        self.calls = np.zeros((capacity, MAX_PHASES), dtype=np.int64)  # Ring of per-tick call counts
+        self.total_seconds = np.zeros(MAX_PHASES)
+        self.total_calls = np.zeros(MAX_PHASES, dtype=np.int64)
+        self.ticks = 0  # Ticks completed
+        self._row = 0
+        self.cprofile_window = cprofile_window  # (first tick, last tick) to run cProfile over, or None
+        self.tracemalloc_window = tracemalloc_window  # (first tick, last tick) to trace allocations over, or None
+        self._cprofile = None
+        self.cprofile_stats = None  # pstats.Stats once the cProfile window has closed
+        self._snapshot = None
+        self.allocations = None  # tracemalloc StatisticDiff list once the tracemalloc window has closed
+        self._started = time.perf_counter()
+        self._check_windows()
+
+    def column(self, phase):
+        """Column of a phase, registering it on first use."""
+        column = self._column.get(phase)
+        if column is None:
+            if len(self.phases) == MAX_PHASES:
+                raise ValueError(f"at most {MAX_PHASES} profiler phases")
+            column = self._column[phase] = len(self.phases)
+            self.phases.append(phase)
+        return column
+
+    def add(self, phase, seconds, calls=1):
+        """Charge `seconds` of wall time and `calls` calls to `phase` in the current tick."""
+        column = self.column(phase)
+        self.seconds[self._row, column] += seconds
+        self.calls[self._row, column] += calls
+
+    def elapsed(self, phase):
+        """Seconds charged to `phase` so far in the current tick."""
+        return float(self.seconds[self._row, self.column(phase)])
+
+    def end_tick(self):
+        """Close the current tick's row and start the next one."""
+        row = self._row
+        self.total_seconds += self.seconds[row]
+        self.total_calls += self.calls[row]
+        self.ticks += 1
+        self._row = self.ticks % self.capacity
+        self.seconds[self._row] = 0.0
+        self.calls[self._row] = 0
+        self._check_windows()
+
+    def _check_windows(self):
+        tick = self.ticks
+        window = self.cprofile_window
+        if window is not None:
+            if tick == window[0]:
+                self._cprofile = cProfile.Profile()
+                self._cprofile.enable()
+            elif tick == window[1] + 1 and self._cprofile is not None:
+                self._stop_cprofile()
+        window = self.tracemalloc_window
+        if window is not None:
+            if tick == window[0]:
+                tracemalloc.start()
+                self._snapshot = _snapshot()
+            elif tick == window[1] + 1 and self._snapshot is not None:
+                self._stop_tracemalloc()
+
+    def _stop_cprofile(self):
+        self._cprofile.disable()
+        self.cprofile_stats = pstats.Stats(self._cprofile)
+        self._cprofile = None
+
+    def _stop_tracemalloc(self):
+        self.allocations = _snapshot().compare_to(self._snapshot, 'lineno')
+        self._snapshot = None
+        tracemalloc.stop()
+
+    def close(self):
+        """Stop captures whose window the run did not reach the end of."""
+        if self._cprofile is not None:
+            self._stop_cprofile()
+        if self._snapshot is not None:
+            self._stop_tracemalloc()
+
+    def summary(self):
+        """Per-phase rows of (phase, calls, total seconds, share of wall time, mean and p99 per tick)."""
+        wall = time.perf_counter() - self._started
+        recent = self.seconds[:min(self.ticks, self.capacity)]
+        rows = []
+        for column, phase in enumerate(self.phases):
+            total = float(self.total_seconds[column])
+            p99 = float(np.percentile(recent[:, column], 99)) if len(recent) else 0.0
+            rows.append((phase, int(self.total_calls[column]), total, total / wall if wall else 0.0,
+                         total / self.ticks if self.ticks else 0.0, p99))
+        return rows
+
+    def print_summary(self, top=15):
+        self.close()
+        print(f"-- Profile: {self.ticks} ticks --")
+        print(f"{'phase':<12} {'calls':>10} {'total s':>9} {'share':>6} {'mean us/tick':>13} {'p99 us/tick':>12}")
+        for phase, calls, total, share, mean, p99 in self.summary():
+            print(f"{phase:<12} {calls:>10} {total:>9.3f} {share * 100:>5.1f}% {mean * 1e6:>13.1f} {p99 * 1e6:>12.1f}")
+        if self.cprofile_stats is not None:
+            out = io.StringIO()
+            self.cprofile_stats.stream = out
+            self.cprofile_stats.sort_stats('cumulative').print_stats(top)
+            print(f"-- cProfile, ticks {self.cprofile_window[0]}-{self.cprofile_window[1]} --")
+            print(out.getvalue().strip())
+        if self.allocations is not None:
+            print(f"-- Allocations, ticks {self.tracemalloc_window[0]}-{self.tracemalloc_window[1]} --")
+            for stat in self.allocations[:top]:
+                print(stat)
+
+
+def _snapshot():
+    """Allocation snapshot without tracemalloc's own bookkeeping."""
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
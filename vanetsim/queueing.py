@@ -0,0 +1,180 @@
+"""RSU modelled as a single-server queue with a finite buffer and a drop policy.
+
+Instead of going offline for good after a lifetime message count, the
+RSU serves one packet every 1 / service_rate seconds and holds at most
+buffer_size waiting packets; what happens to an arrival at a full buffer
+depends on the policy:
+
+- ``tail``: FIFO service, the arrival is dropped.
+- ``fair``: per-source round-robin service; the newest packet of the
+  source with the longest queue is dropped, so a flooding source only
+  ever loses its own packets.
+- ``priority``: packets from authenticated (enrolled) keys are served
+  first and push out the newest unauthenticated packet when the buffer is
+  full.
+
+The server is advanced lazily to each arrival's time, so no events are
+scheduled for departures and each packet costs O(1) work however large
+the flood. Loss and queueing latency are recorded per class, legitimate
+and malicious, for reporting only; the RSU itself never sees that flag.
+"""
+from collections import defaultdict, deque
+
+from .eventlog import ACCEPT, DROP, NULL_LOG
+
+POLICIES = ('tail', 'fair', 'priority')
+CLASSES = ('legitimate', 'malicious')  # Indexed by vehicle.is_malicious
+
+
+class QueueingRSU:
+    """RSU serving packets at `service_rate` per second from a buffer of `buffer_size`."""
+
+    def __init__(self, rid, x, y, comm_range=300, service_rate=2500.0, buffer_size=250, policy='tail',
+                 authenticated=()):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown drop policy {policy!r}, expected one of {POLICIES}")
+        if buffer_size < 1:
+            raise ValueError(f"buffer_size must be at least 1, got {buffer_size}")
+        self.rid = rid
+        self.x = x  # World position in metres
+        self.y = y
+        self.comm_range = comm_range  # Communication range in metres
+        self.service_time = 1.0 / service_rate  # Seconds per packet
+        self.buffer_size = buffer_size  # Packets waiting, not counting the one in service
+        self.policy = policy
+        self.authenticated = set(authenticated)  # Enrolled keys served first under the priority policy
+        self.operational = True  # A queueing RSU degrades instead of failing
+        self.log = NULL_LOG  # Replaced by the simulation's event log
+
+        self.size = 0  # Packets waiting
+        self.max_size = 0  # Highest buffer occupancy seen
+        self.free_at = 0.0  # Time the server finishes its current packet
+        self._fifo = deque()  # tail: (arrival time, vehicle)
+        self._classes = (deque(), deque())  # priority: authenticated, unauthenticated
+        self._sources = {}  # fair: vehicle id -> deque of (arrival time, vehicle)
+        self._turns = deque()  # fair: vehicle ids with waiting packets, in round-robin order
+        self._by_length = defaultdict(set)  # fair: queue length -> vehicle ids with that length
+        self._longest = 0  # fair: length of the longest source queue
+
+        self.arrived = [0, 0]  # Per class, see CLASSES
+        self.served = [0, 0]
+        self.dropped = [0, 0]
+        self.latency_total = [0.0, 0.0]  # Seconds from arrival to end of service, summed
+        self.latency_max = [0.0, 0.0]
+
+    def accepts(self, vehicle):
+        return True
+
+    def receive_message(self, vehicle, now):
+        """Queue a packet, dropping one by the policy if the buffer is full."""
+        self.advance(now)
+        self.arrived[vehicle.is_malicious] += 1
+        if self.size >= self.buffer_size:
+            victim = self._make_room(vehicle)
+            self._drop(victim)
+            if victim is vehicle:
+                return
+        self._enqueue(now, vehicle)
+        if self.size > self.max_size:
+            self.max_size = self.size
+
+    def _drop(self, vehicle):
+        self.dropped[vehicle.is_malicious] += 1
+        if self.log.packets:
+            self.log.event(DROP, vehicle.vid, self.rid)
+
+    def _enqueue(self, now, vehicle):
+        self.size += 1
+        job = (now, vehicle)
+        if self.policy == 'tail':
+            self._fifo.append(job)
+        elif self.policy == 'priority':
+            self._classes[vehicle.key not in self.authenticated].append(job)
+        else:
+            queue = self._sources.get(vehicle.vid)
+            if queue is None:
+                queue = self._sources[vehicle.vid] = deque()
+                self._turns.append(vehicle.vid)
+            self._resize(vehicle.vid, len(queue), len(queue) + 1)
+            queue.append(job)
+
+    def _make_room(self, vehicle):
+        """Return the vehicle whose packet is dropped: the arrival itself, or a pushed-out waiting packet."""
+        if self.policy == 'priority':
+            unauthenticated = self._classes[1]
+            if vehicle.key in self.authenticated and unauthenticated:
+                self.size -= 1
+                return unauthenticated.pop()[1]
+        elif self.policy == 'fair':
+            own = self._sources.get(vehicle.vid)
+            if own is None or len(own) < self._longest:
+                vid = next(iter(self._by_length[self._longest]))
+                queue = self._sources[vid]
+                self._resize(vid, len(queue), len(queue) - 1)
+                self.size -= 1
+                victim = queue.pop()[1]
+                if not queue:
+                    del self._sources[vid]
+                    self._turns.remove(vid)  # Rare: only when the longest queue held one packet
+                return victim
+        return vehicle
+
+    def _resize(self, vid, old, new):
+        """Keep the length buckets of the fair policy in step with a source queue."""
+        if old:
+            self._by_length[old].discard(vid)
+        if new:
+            self._by_length[new].add(vid)
+        if new > self._longest:
+            self._longest = new
+        elif old == self._longest and not self._by_length[old]:
+            self._longest = new
+
+    def _next_job(self):
+        if self.policy == 'tail':
+            return self._fifo.popleft()
+        if self.policy == 'priority':
+            return (self._classes[0] or self._classes[1]).popleft()
+        vid = self._turns.popleft()
+        queue = self._sources[vid]
+        self._resize(vid, len(queue), len(queue) - 1)
+        job = queue.popleft()
+        if queue:
+            self._turns.append(vid)
+        else:
+            del self._sources[vid]
+        return job
+
+    def advance(self, now):
+        """Serve every packet whose service starts before `now`."""
+        free_at = self.free_at
+        service_time = self.service_time
+        while self.size and free_at < now:
+            arrival, vehicle = self._next_job()
+            self.size -= 1
+            free_at = max(free_at, arrival) + service_time
+            latency = free_at - arrival
+            cls = vehicle.is_malicious
+            self.served[cls] += 1
+            self.latency_total[cls] += latency
+            if latency > self.latency_max[cls]:
+                self.latency_max[cls] = latency
+            vehicle.fleet.received[vehicle.vid] += 1
+            if self.log.packets:
+                self.log.event(ACCEPT, vehicle.vid, self.rid)
+        self.free_at = free_at
+
+
+def queue_stats(rsus):
+    """Loss and latency per class over queueing RSUs; packets still waiting count as neither served nor lost."""
+    stats = {'max_buffer': max((rsu.max_size for rsu in rsus), default=0)}
+    for cls, name in enumerate(CLASSES):
+        arrived = sum(rsu.arrived[cls] for rsu in rsus)
+        served = sum(rsu.served[cls] for rsu in rsus)
+        dropped = sum(rsu.dropped[cls] for rsu in rsus)
+        stats[f'{name}_arrived'] = arrived
+        stats[f'{name}_served'] = served
+        stats[f'{name}_loss'] = dropped / arrived if arrived else 0.0
+        stats[f'{name}_mean_latency'] = sum(rsu.latency_total[cls] for rsu in rsus) / served if served else 0.0
+        stats[f'{name}_max_latency'] = max((rsu.latency_max[cls] for rsu in rsus), default=0.0)
+    return stats
@@ -0,0 +1,260 @@
+"""pygame rendering for the simulation: a pre-rendered road layer plus dirty-rectangle updates.
+
+Roads never change, so they are drawn once onto a background surface. Each
+frame only the sprites that moved, the communication lines and the overlay
+text are redrawn, and only those rectangles are pushed to the display.
+This module is the only part of the package that needs pygame.
+"""
+import time
+
+import pygame
+
+WHITE = (255, 255, 255)  # Background color
+BLACK = (0, 0, 0)  # Road lines
+MALICIOUS_LINE_COLOR = (255, 0, 0)  # Red for malicious vehicle communication
+LEGITIMATE_LINE_COLOR = (0, 255, 0)  # Green for legitimate vehicle communication
+RED = (255, 0, 0)  # Red for RSU inoperability, revoked keys and text
+
+
+def load_icon(path, size):
+    """Load an image, convert it to the display pixel format and scale it."""
+    return pygame.transform.scale(pygame.image.load(path).convert_alpha(), size)
+
+
+def placeholder_icon(color, size):
+    """Plain rectangle icon for runs without the image assets."""
+    surface = pygame.Surface(size).convert()
+    surface.fill(color)
+    return surface
+
+
+def draw_road_layer(size, segments, color=BLACK, background=WHITE, width=2):
+    """Draw road segments once onto a background surface in display format.
+
+    segments is an iterable of ((x1, y1), (x2, y2)) screen positions.
+    """
+    layer = pygame.Surface(size).convert()
+    layer.fill(background)
+    for pos1, pos2 in segments:
+        pygame.draw.line(layer, color, pos1, pos2, width)
+    return layer
+
+
+def road_layer_for(network, viewport, **kwargs):
+    """Road layer for a RoadNetwork seen through a Viewport."""
+    screen_xy = viewport.to_screen_array(network.world_xy).tolist()
+    sources, targets = network.edge_pairs()
+    segments = ((screen_xy[a], screen_xy[b]) for a, b in zip(sources.tolist(), targets.tolist()))
+    return draw_road_layer((viewport.width, viewport.height), segments, **kwargs)
+
+
+class VehicleSprite(pygame.sprite.DirtySprite):
+    """Thin view of one row of the VehicleStore, redrawn only when it moves."""
+
+    def __init__(self, vehicle, image):
+        super().__init__()
+        self.vehicle = vehicle
+        self.image = image
+        self.rect = image.get_rect()
+
+    def sync(self, center):
+        if self.rect.center != center:
+            self.rect.center = center
+            self.dirty = 1
+
+
+class RSUSprite(pygame.sprite.DirtySprite):
+    def __init__(self, rsu, image, center):
+        super().__init__()
+        self.rsu = rsu
+        self.image = image
+        self.rect = image.get_rect(center=center)
+
+
+class Renderer:
+    """Draws a Simulation onto a pygame display using dirty rectangles."""
+
+    def __init__(self, sim, network, screen, viewport, icons=None):
+        self.sim = sim
+        self.screen = screen
+        self.viewport = viewport
+        self.background = road_layer_for(network, viewport)
+        self.font = pygame.font.Font(None, 36)
+        icons = icons or {}
+        self.icons = {
+            'malicious': icons.get('malicious') or placeholder_icon(MALICIOUS_LINE_COLOR, (20, 12)),
+            'legitimate': icons.get('legitimate') or placeholder_icon(LEGITIMATE_LINE_COLOR, (20, 12)),
+            'rsu': icons.get('rsu') or placeholder_icon(BLACK, (30, 30)),
+        }
+        self.group = pygame.sprite.LayeredDirty()
+        self.group.clear(screen, self.background)
+        self.vehicle_sprites = []
+        self.rsu_sprites = []
+        self._rsu_sprite = {}  # RSU id -> sprite
+        self._overlay_rects = []  # Lines and text drawn last frame, repainted before the next one
+        self.sync_sprites()
+        screen.blit(self.background, (0, 0))
+        pygame.display.flip()  # One full update; every later frame is incremental
+
+    def _center(self, x, y):
+        sx, sy = self.viewport.to_screen(x, y)
+        return round(sx), round(sy)
+
+    def sync_sprites(self):
+        """Create sprites for vehicles and RSUs added since the last frame."""
+        for vehicle in self.sim.vehicles[len(self.vehicle_sprites):]:
+            image = self.icons['malicious' if vehicle.is_malicious else 'legitimate']
+            sprite = VehicleSprite(vehicle, image)
+            self.vehicle_sprites.append(sprite)
+            self.group.add(sprite, layer=1)
+        for rsu in self.sim.rsus[len(self.rsu_sprites):]:
+            sprite = RSUSprite(rsu, self.icons['rsu'], self._center(rsu.x, rsu.y))
+            self.rsu_sprites.append(sprite)
+            self._rsu_sprite[rsu.rid] = sprite
+            self.group.add(sprite, layer=0)
+
+    def draw(self, status_text=None):
+        """Redraw the changed parts of the screen and push only those rectangles."""
+        profiler = self.sim.profiler
+        start = time.perf_counter()
+        self.sync_sprites()
+        screen = self.screen
+        n = len(self.vehicle_sprites)
+        centers = self.viewport.to_screen_array(self.sim.fleet.pos[:n]).round().astype(int).tolist()
+        for sprite, center in zip(self.vehicle_sprites, centers):
+            sprite.sync(tuple(center))
+
+        for rect in self._overlay_rects:
+            self.group.repaint_rect(rect)
+        rects = self.group.draw(screen, self.background)
+        drawn = time.perf_counter()
+
+        overlay = []
+        # Communication lines from vehicles to the RSU they are talking to
+        for sprite in self.vehicle_sprites:
+            vehicle = sprite.vehicle
+            rsu = self.sim.nearest_rsu(vehicle)
+            if rsu is not None and rsu.accepts(vehicle):
+                color = MALICIOUS_LINE_COLOR if vehicle.is_malicious else LEGITIMATE_LINE_COLOR
+                rsu_center = self._rsu_sprite[rsu.rid].rect.center
+                overlay.append(pygame.draw.line(screen, color, sprite.rect.center, rsu_center, 2))
+            if vehicle.revoked:
+                # Draw 'X' on the vehicle icon if its key is revoked
+                overlay.append(pygame.draw.line(screen, RED, sprite.rect.topleft, sprite.rect.bottomright, 3))
+                overlay.append(pygame.draw.line(screen, RED, sprite.rect.bottomleft, sprite.rect.topright, 3))
+            elif vehicle.communication_error:
+                marker = self.font.render("?", True, RED)
+                overlay.append(screen.blit(marker, (sprite.rect.centerx - 15, sprite.rect.centery - 20)))
+
+        for sprite in self.rsu_sprites:
+            if not sprite.rsu.operational:
+                r = sprite.rect
+                overlay.append(pygame.draw.rect(screen, RED, (r.x - 10, r.y - 10, r.width + 20, r.height + 20), 5))
+                text = self.font.render('RSU INOPERABLE', True, RED)
+                overlay.append(screen.blit(text, (r.x + 10, r.y - 30)))
+
+        text = status_text or f"Time: {self.sim.now:.1f}s"
+        overlay.append(screen.blit(self.font.render(text, True, RED), (10, 10)))
+
+        overlaid = time.perf_counter()
+        pygame.display.update(rects + overlay + self._overlay_rects)
+        self._overlay_rects = [rect.inflate(2, 2) for rect in overlay]
+        if profiler is not None:
+            profiler.add('sprites', drawn - start)
+            profiler.add('overlay', overlaid - drawn)
+            profiler.add('display', time.perf_counter() - overlaid)
+
+
+class Viewer:
+    """Interactive window that decouples the simulation tick rate from the display frame rate.
+
+    With ticks_per_frame set, exactly that many ticks run between frames.
+    Otherwise the simulation advances `speed` simulated seconds per wall
+    second (None runs as fast as the CPU allows) while frames are drawn at
+    `fps`. Rendering never changes simulation results, only how often
+    they are looked at.
+
+    Keys: SPACE pause, RIGHT / = faster, LEFT / - slower, F as fast as
+    possible, . single tick while paused, ESC quit.
+    """
+
+    def __init__(self, renderer, fps=30, ticks_per_frame=None, speed=1.0):
+        self.renderer = renderer
+        self.sim = renderer.sim
+        self.fps = fps
+        self.ticks_per_frame = ticks_per_frame
+        self.speed = speed  # Simulated seconds per wall second, None for unlimited
+        self.paused = False
+        self._tick_budget = 0.0  # Fractional ticks owed to the speed setting
+
+    def _handle_key(self, key):
+        if key == pygame.K_SPACE:
+            self.paused = not self.paused
+        elif key in (pygame.K_RIGHT, pygame.K_EQUALS, pygame.K_PLUS):
+            self.ticks_per_frame = self.ticks_per_frame * 2 if self.ticks_per_frame else None
+            self.speed = self.speed * 2 if self.speed else None
+        elif key in (pygame.K_LEFT, pygame.K_MINUS):
+            self.ticks_per_frame = max(1, self.ticks_per_frame // 2) if self.ticks_per_frame else None
+            self.speed = self.speed / 2 if self.speed else 1.0
+        elif key == pygame.K_f:
+            self.ticks_per_frame, self.speed = None, None
+        elif key == pygame.K_PERIOD and self.paused:
+            self.sim.step()
+        elif key == pygame.K_ESCAPE:
+            return False
+        return True
+
+    def _advance(self, end_tick, frame_seconds, deadline):
+        sim = self.sim
+        if self.ticks_per_frame:
+            for _ in range(min(self.ticks_per_frame, end_tick - sim.tick)):  # Exactly N ticks, however long
+                sim.step()
+            return
+        if self.speed is not None:
+            self._tick_budget += self.speed * frame_seconds / sim.dt
+            ticks = int(self._tick_budget)
+            self._tick_budget -= ticks
+        else:
+            ticks = end_tick  # Unlimited: step until the frame deadline
+        for _ in range(ticks):
+            if sim.tick >= end_tick or pygame.time.get_ticks() >= deadline:
+                self._tick_budget = 0.0  # Falling behind; do not try to catch up later
+                break
+            sim.step()
+
+    def status_text(self):
+        if self.paused:
+            mode = 'PAUSED'
+        elif self.ticks_per_frame:
+            mode = f"{self.ticks_per_frame} ticks/frame"
+        elif self.speed is not None:
+            mode = f"x{self.speed:g}"
+        else:
+            mode = 'max speed'
+        return f"Time: {self.sim.now:.1f}s  {mode}"
+
+    def run(self, duration):
+        """Run until `duration` simulated seconds or until the window is closed."""
+        end_tick = round(duration / self.sim.dt)
+        clock = pygame.time.Clock()
+        frame_seconds = 0.0
+        running = True
+        while running and self.sim.tick < end_tick:
+            start = time.perf_counter()
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    running = self._handle_key(event.key) and running
+            if self.sim.profiler is not None:
+                self.sim.profiler.add('input', time.perf_counter() - start)
+            if not self.paused:
+                deadline = pygame.time.get_ticks() + 1000 // self.fps  # Leave room to keep the frame rate
+                self._advance(end_tick, frame_seconds, deadline)
+            self.renderer.draw(self.status_text())
+            start = time.perf_counter()
+            frame_seconds = clock.tick(self.fps) / 1000
+            if self.sim.profiler is not None:
+                self.sim.profiler.add('wait', time.perf_counter() - start)
+        self.sim.finish()
+        return self.sim
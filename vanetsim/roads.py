@@ -0,0 +1,256 @@
+"""Road network loading shared by the headless engine and the scenario setup.
+
+Parsing and simplifying a city-sized OSM file dominates startup, so the
+simplified network is saved once as NumPy arrays (node coordinates, CSR
+adjacency and the OSM id mapping) in a cache directory next to the source
+file. Later runs memory-map those arrays instead of touching the XML. The
+cache records the SHA-256 of the source and is rebuilt when it changes.
+
+Node positions are also stored in world coordinates (metres on a local
+projection around the map centre), which is what the simulation runs in;
+a ``Viewport`` scales them to the screen only at render time.
+
+Build the cache ahead of time with: python -m vanetsim.roads D:/HONS/Edinburgh.osm
+"""
+import hashlib
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+DEFAULT_OSM_FILE = 'D:/HONS/Edinburgh.osm'
+CACHE_FORMAT = 2  # Bump when the array layout changes
+_ARRAYS = ('node_ids', 'xy', 'world_xy', 'indptr', 'indices', 'lengths')
+EARTH_RADIUS = 6371008.8  # Mean earth radius in metres
+
+
+def project_lonlat(xy, centre=None):
+    """Project (lon, lat) degrees to local equirectangular metres around `centre`, by default that of the points."""
+    lon0, lat0 = (xy.min(axis=0) + xy.max(axis=0)) / 2 if centre is None else centre
+    metres_per_degree = EARTH_RADIUS * math.pi / 180
+    world = np.empty_like(xy, dtype=np.float64)
+    world[:, 0] = (xy[:, 0] - lon0) * metres_per_degree * math.cos(math.radians(lat0))
+    world[:, 1] = (xy[:, 1] - lat0) * metres_per_degree
+    return world
+
+
+class Viewport:
+    """Maps world coordinates onto a width x height screen, as scale_and_translate did in the scripts."""
+
+    def __init__(self, min_x, min_y, max_x, max_y, width, height):
+        self.min_x, self.min_y = min_x, min_y
+        self.width, self.height = width, height
+        self.scale_x = width / (max_x - min_x)
+        self.scale_y = height / (max_y - min_y)
+
+    def to_screen(self, x, y):
+        """Scale and translate a world position into screen pixels."""
+        return (x - self.min_x) * self.scale_x, (y - self.min_y) * self.scale_y
+
+    def to_screen_array(self, xy):
+        """Scale an (N, 2) array of world positions into screen pixels."""
+        return (np.asarray(xy) - (self.min_x, self.min_y)) * (self.scale_x, self.scale_y)
+
+    def to_world(self, sx, sy):
+        """Inverse of to_screen, e.g. for placing RSUs by screen position."""
+        return sx / self.scale_x + self.min_x, sy / self.scale_y + self.min_y
+
+    def to_world_distance(self, pixels):
+        """A screen distance in metres, e.g. a range the scripts measured in pixels.
+
+        The two axes may scale differently; their geometric mean keeps the
+        covered area of a screen circle.
+        """
+        return pixels / (self.scale_x * self.scale_y) ** 0.5
+
+
+class RoadNetwork:
+    """Simplified road graph stored as node coordinate arrays and CSR edge arrays.
+
+    Nodes are addressed by their index in graph order; ``node_ids`` maps an
+    index back to its OSM id. The outgoing edges of node ``i`` are
+    ``indices[indptr[i]:indptr[i + 1]]`` with matching ``lengths`` in metres.
+    """
+
+    def __init__(self, node_ids, xy, world_xy, indptr, indices, lengths):
+        self.node_ids = node_ids  # (N,) int64 OSM node ids
+        self.xy = xy  # (N, 2) float64 map coordinates as found in the source (lon, lat)
+        self.world_xy = world_xy  # (N, 2) float64 world coordinates in metres
+        self.indptr = indptr  # (N + 1,) int64 CSR row pointers
+        self.indices = indices  # (E,) int32 edge target node indices
+        self.lengths = lengths  # (E,) float32 edge lengths
+        self._index_of = None
+        self._edge_keys = None  # Sorted source * N + target keys for edge_index
+        self._edge_order = None
+        self.cache_dir = None  # Set when loaded from a cache, so worker processes can map the same files
+
+        # World bounds used for scaling node positions to the screen
+        self.min_x, self.min_y = (float(v) for v in world_xy.min(axis=0))
+        self.max_x, self.max_y = (float(v) for v in world_xy.max(axis=0))
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    @classmethod
+    def from_graph(cls, G):
+        """Build the network from an osmnx / networkx graph."""
+        node_ids = np.fromiter(G.nodes, dtype=np.int64, count=G.number_of_nodes())
+        index_of = {node: i for i, node in enumerate(G.nodes)}
+        xy = np.array([(data['x'], data['y']) for _, data in G.nodes(data=True)], dtype=np.float64).reshape(-1, 2)
+        if str(G.graph.get('crs', 'epsg:4326')).lower() == 'epsg:4326':
+            world_xy = project_lonlat(xy)
+        else:
+            world_xy = xy.copy()  # Already projected to metres
+
+        src, dst, lengths = [], [], []
+        for u, v, data in G.edges(data=True):
+            i, j = index_of[u], index_of[v]
+            src.append(i)
+            dst.append(j)
+            length = data.get('length')
+            if length is None:
+                length = math.dist(world_xy[i], world_xy[j])
+            lengths.append(length)
+        src = np.asarray(src, dtype=np.int64)
+        order = np.argsort(src, kind='stable')  # Group edges by source node, keeping graph order
+        indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(node_ids)), out=indptr[1:])
+        indices = np.asarray(dst, dtype=np.int32)[order]
+        lengths = np.asarray(lengths, dtype=np.float32)[order]
+        return cls(node_ids, xy, world_xy, indptr, indices, lengths)
+
+    def index_of(self, node_id):
+        """Return the node index of an OSM node id."""
+        if self._index_of is None:
+            self._index_of = {int(node): i for i, node in enumerate(self.node_ids)}  # Built on first use only
+        return self._index_of[node_id]
+
+    def edge_pairs(self):
+        """Return (source, target) node index arrays, one entry per edge."""
+        sources = np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+        return sources, np.asarray(self.indices)
+
+    def edge_index(self, sources, targets):
+        """CSR index of the edge from each source to each target node, or -1 where there is none."""
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if self._edge_keys is None:
+            # Edge keys sorted once so any number of (source, target) pairs can be found by binary search
+            edge_sources, edge_targets = self.edge_pairs()
+            keys = edge_sources.astype(np.int64) * self.num_nodes + edge_targets
+            self._edge_order = np.argsort(keys, kind='stable')  # First of any parallel edges wins
+            self._edge_keys = keys[self._edge_order]
+        keys = sources * self.num_nodes + targets
+        if self.num_edges == 0:
+            return np.full(keys.shape, -1, dtype=np.int64)
+        found = np.minimum(np.searchsorted(self._edge_keys, keys), self.num_edges - 1)
+        return np.where(self._edge_keys[found] == keys, self._edge_order[found], -1)
+
+    def neighbours(self, i):
+        """Outgoing neighbour indices of node i."""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def viewport(self, width, height):
+        """Viewport fitting the whole network into a width x height screen."""
+        return Viewport(self.min_x, self.min_y, self.max_x, self.max_y, width, height)
+
+    def save(self, cache_dir, source_info=None):
+        """Write the arrays and metadata into cache_dir."""
+        os.makedirs(cache_dir, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(cache_dir, name + '.npy'), np.asarray(getattr(self, name)))
+        meta = {'format': CACHE_FORMAT, 'nodes': self.num_nodes, 'edges': self.num_edges}
+        meta.update(source_info or {})
+        with open(os.path.join(cache_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)  # Written last, so a partial cache is never picked up
+
+    @classmethod
+    def load(cls, cache_dir, mmap=True):
+        """Load a saved network, memory-mapping the arrays by default."""
+        mode = 'r' if mmap else None
+        arrays = [np.load(os.path.join(cache_dir, name + '.npy'), mmap_mode=mode) for name in _ARRAYS]
+        network = cls(*arrays)
+        network.cache_dir = cache_dir
+        return network
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_cache_dir(osm_file):
+    return os.path.splitext(osm_file)[0] + '.netcache'
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _cache_is_current(cache_dir, osm_file):
+    """True if the cache was built from the current contents of osm_file."""
+    meta = _read_meta(cache_dir)
+    if meta is None or meta.get('format') != CACHE_FORMAT:
+        return False
+    stat = os.stat(osm_file)
+    if meta.get('size') == stat.st_size and meta.get('mtime') == stat.st_mtime:
+        return True  # Unchanged stat, skip re-hashing a large file
+    if meta.get('sha256') != file_sha256(osm_file):
+        return False
+    # Same contents with a new timestamp: refresh the stamp so the next check is cheap
+    meta.update(size=stat.st_size, mtime=stat.st_mtime)
+    with open(os.path.join(cache_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return True
+
+
+def build_cache(osm_file=DEFAULT_OSM_FILE, cache_dir=None):
+    """Parse the OSM file once and save the simplified network into the cache."""
+    import osmnx as ox  # Imported lazily, only needed when parsing the XML
+
+    cache_dir = cache_dir or default_cache_dir(osm_file)
+    G = ox.graph_from_xml(osm_file, simplify=True)
+    network = RoadNetwork.from_graph(G)
+    stat = os.stat(osm_file)
+    network.save(cache_dir, {
+        'source': os.path.abspath(osm_file),
+        'sha256': file_sha256(osm_file),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+    })
+    return network
+
+
+def load_road_network(osm_file=DEFAULT_OSM_FILE, cache_dir=None, use_cache=True):
+    """Load the simplified road network, from the cache when it is current."""
+    cache_dir = cache_dir or default_cache_dir(osm_file)
+    if use_cache and _cache_is_current(cache_dir, osm_file):
+        return RoadNetwork.load(cache_dir)
+    return build_cache(osm_file, cache_dir)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    osm_file = argv[0] if argv else DEFAULT_OSM_FILE
+    cache_dir = argv[1] if len(argv) > 1 else None
+    network = build_cache(osm_file, cache_dir)
+    print(f"Cached {network.num_nodes} nodes and {network.num_edges} edges in {cache_dir or default_cache_dir(osm_file)}")
+
+
+if __name__ == '__main__':
+    main()
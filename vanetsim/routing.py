@@ -0,0 +1,197 @@
+"""Shortest-path routing over the road network with an LRU and on-disk route cache.
+
+Routes follow real road edges, weighted by edge length. Single-source
+Dijkstra runs settle every destination that shares an origin in one pass,
+recently used routes are kept in an LRU cache, and large batches of trips
+can be precomputed across a pool of worker processes and saved to disk so
+later runs start without any Dijkstra calls.
+"""
+import heapq
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .roads import RoadNetwork
+
+POOL_ORIGINS = 256  # Fewer Dijkstra runs than this are routed in-process; a pool costs more to start
+
+
+class _Adjacency:
+    """Plain-list copy of the CSR arrays; element access on lists is far faster than on NumPy arrays."""
+
+    def __init__(self, network):
+        self.indptr = network.indptr.tolist()
+        self.indices = network.indices.tolist()
+        self.lengths = network.lengths.tolist()
+
+    def shortest_paths(self, source, targets):
+        """Dijkstra from source, stopping once every target is settled; return {target: path or None}."""
+        indptr, indices, lengths = self.indptr, self.indices, self.lengths
+        remaining = set(targets)
+        dist = {source: 0.0}
+        prev = {}
+        settled = set()
+        heap = [(0.0, source)]
+        while heap and remaining:
+            d, u = heapq.heappop(heap)
+            if u in settled:
+                continue
+            settled.add(u)
+            remaining.discard(u)
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                nd = d + lengths[k]
+                if nd < dist.get(v, float('inf')):
+                    dist[v] = nd
+                    prev[v] = u
+                    heapq.heappush(heap, (nd, v))
+
+        paths = {}
+        for target in targets:
+            if target not in settled:
+                paths[target] = None  # Unreachable on the directed road graph
+                continue
+            path = [target]
+            while path[-1] != source:
+                path.append(prev[path[-1]])
+            path.reverse()
+            paths[target] = tuple(path)
+        return paths
+
+
+# Per-process state for precompute workers
+_worker_adjacency = None
+
+
+def _init_worker(source):
+    """Load the network once per worker, memory-mapped from the cache when possible."""
+    global _worker_adjacency
+    network = RoadNetwork.load(source) if isinstance(source, str) else source
+    _worker_adjacency = _Adjacency(network)
+
+
+def _route_from(origin, destinations):
+    return origin, _worker_adjacency.shortest_paths(origin, destinations)
+
+
+class Router:
+    """Computes and caches shortest routes between node indices of a RoadNetwork."""
+
+    def __init__(self, network, cache_size=100000, workers=None):
+        self.network = network
+        self.cache_size = cache_size  # Maximum number of routes kept in memory
+        self.workers = workers  # precompute() processes; None for one per CPU, 1 inside worker processes
+        self._routes = OrderedDict()  # (origin, destination) -> path tuple or None, in LRU order
+        self._adjacency = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def adjacency(self):
+        if self._adjacency is None:
+            self._adjacency = _Adjacency(self.network)  # Built on first Dijkstra only
+        return self._adjacency
+
+    def __len__(self):
+        return len(self._routes)
+
+    def _store(self, origin, destination, path):
+        self._routes[(origin, destination)] = path
+        self._routes.move_to_end((origin, destination))
+        if len(self._routes) > self.cache_size:
+            self._routes.popitem(last=False)  # Evict the least recently used route
+
+    def route(self, origin, destination):
+        """Shortest path from origin to destination as a tuple of node indices, or None if unreachable."""
+        key = (origin, destination)
+        if key in self._routes:
+            self.hits += 1
+            self._routes.move_to_end(key)
+            return self._routes[key]
+        self.misses += 1
+        path = self.adjacency.shortest_paths(origin, [destination])[destination]
+        self._store(origin, destination, path)
+        return path
+
+    def route_via(self, waypoints, loop=True):
+        """Road-following path through the waypoints, closed back to the start when loop is set.
+
+        Legs with no road connection fall back to a direct hop between the
+        two waypoints, as the original three-node paths did.
+        """
+        stops = list(waypoints) + ([waypoints[0]] if loop and len(waypoints) > 1 else [])
+        path = [stops[0]]
+        for origin, destination in zip(stops, stops[1:]):
+            leg = self.route(origin, destination)
+            path.extend(leg[1:] if leg else [destination])
+        if loop and len(path) > 1:
+            path.pop()  # The vehicle loops back to path[0] by itself
+        return path
+
+    def precompute(self, pairs, workers=None, chunk_size=64):
+        """Route many (origin, destination) pairs, one Dijkstra per origin, across worker processes.
+
+        `workers` defaults to the router's own setting. Batches with fewer
+        than POOL_ORIGINS origins are routed in-process.
+        """
+        workers = workers or self.workers
+        by_origin = {}
+        for origin, destination in pairs:
+            if (origin, destination) not in self._routes:
+                by_origin.setdefault(int(origin), set()).add(int(destination))
+        if not by_origin:
+            return
+        if workers == 1 or len(by_origin) < POOL_ORIGINS:
+            for origin, destinations in by_origin.items():
+                for destination, path in self.adjacency.shortest_paths(origin, destinations).items():
+                    self._store(origin, destination, path)
+            return
+
+        # Workers memory-map the cached arrays instead of receiving a pickled copy
+        source = self.network.cache_dir or self.network
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(source,)) as pool:
+            results = pool.map(_route_from, by_origin.keys(), by_origin.values(), chunksize=chunk_size)
+            for origin, paths in results:
+                for destination, path in paths.items():
+                    self._store(origin, destination, path)
+
+    def save(self, path):
+        """Write the cached routes to a compressed .npz file."""
+        origins, destinations, offsets, nodes = [], [], [0], []
+        for (origin, destination), route in self._routes.items():
+            origins.append(origin)
+            destinations.append(destination)
+            nodes.extend(route or ())  # An empty route marks an unreachable pair
+            offsets.append(len(nodes))
+        np.savez_compressed(
+            path,
+            origins=np.asarray(origins, dtype=np.int32),
+            destinations=np.asarray(destinations, dtype=np.int32),
+            offsets=np.asarray(offsets, dtype=np.int64),
+            nodes=np.asarray(nodes, dtype=np.int32),
+            shape=np.asarray([self.network.num_nodes, self.network.num_edges], dtype=np.int64),
+        )
+
+    def load(self, path):
+        """Add routes saved by save(); ignored if they were computed on a different network."""
+        if not os.path.exists(path):
+            return False
+        with np.load(path) as data:
+            if tuple(data['shape']) != (self.network.num_nodes, self.network.num_edges):
+                return False
+            offsets = data['offsets'].tolist()
+            nodes = data['nodes'].tolist()
+            for i, (origin, destination) in enumerate(zip(data['origins'].tolist(), data['destinations'].tolist())):
+                route = tuple(nodes[offsets[i]:offsets[i + 1]])
+                self._store(origin, destination, route or None)
+        return True
+
+
+def random_trips(network, count, rng=None):
+    """Sample `count` distinct-endpoint (origin, destination) node pairs."""
+    rng = rng or np.random.default_rng()
+    origins = rng.integers(0, network.num_nodes, count)
+    destinations = (origins + rng.integers(1, network.num_nodes, count)) % network.num_nodes
+    return list(zip(origins.tolist(), destinations.tolist()))
@@ -0,0 +1,244 @@
+"""Scenario descriptions: vehicle groups, RSUs, their detector and ledger, and how long to run.
+
+A ``Scenario`` is plain data and builds a headless ``Simulation`` on
+whatever road network it is given, so one loaded map can serve many
+scenarios in-process (see ``run_scenarios``). Nothing here imports pygame
+or osmnx; the display is only set up by ``main`` when a window is asked
+for, and the road network is only parsed from OSM when no cache exists.
+
+Scenario files such as Baseline.py describe a ``Scenario`` and hand it to
+``main``.
+"""
+import argparse
+import os
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+
+from .detection import DETECTORS
+from .engine import Simulation
+from .eventlog import LEVELS, EventLog
+from .ledger import Ledger
+from .model import DEFAULT_SPEED, LedgerRSU, LegitimateVehicle, MaliciousVehicle, RSU
+from .queueing import QueueingRSU
+from .roads import DEFAULT_OSM_FILE, load_road_network
+from .routing import Router
+
+# The RSU sits where the visual scripts draw it on their 800x600 window, and reaches as far as they measured
+# on it: Scenario.build converts both through the viewport fitting the map to that window
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+RSU_SCREEN_POSITION = (400, 250)
+
+# Offsets in metres to prevent overlap of legitimate vehicles
+OFFSETS = [(5, 0), (0, 5), (-5, 0), (0, -5), (5, 5)]
+
+PATH_POOL = 64  # Distinct routes at most per vehicle group; larger groups share them
+
+DEFAULT_IMAGES = 'D:/HONS/Images'  # Icon assets of the original scripts
+# Icon name -> (file under the images directory, size); the DDoS and Baseline scripts' set
+ICON_FILES = {'malicious': ('MALICIOUS_CAR.png', (50, 30)), 'legitimate': ('LEGITIMATE_CAR.png', (50, 30)),
+              'rsu': ('RSU.png', (90, 90))}
+
+
+@dataclass
+class VehicleGroup:
+    """`count` vehicles of one kind on looping paths through three waypoints `stride` nodes apart."""
+    count: int = 5
+    malicious: bool = False
+    rate: float = None  # Packets per second, None for the kind's default (20 legitimate, 10000 malicious)
+    stride: int = 3
+    offsets: bool = False  # Spread the vehicles by OFFSETS so they do not overlap on screen
+
+
+@dataclass
+class RSUGroup:
+    """`count` RSUs of one kind: 'capacity' (lifetime message limit), 'queue' or 'ledger' (BRSUM)."""
+    count: int = 1
+    kind: str = 'capacity'
+    comm_range: float = 300  # Screen pixels in a Scenario, as in the scripts; metres when passed to make_rsu
+    max_messages: int = 2500  # capacity RSUs
+    queue: dict = None  # QueueingRSU keyword arguments, queue RSUs
+    detector: str = 'token-bucket'  # ledger RSUs, a name in DETECTORS
+    detector_options: dict = None
+    ledger: dict = None  # Ledger keyword arguments, ledger RSUs
+
+
+@dataclass
+class Scenario:
+    """Everything needed to build and run one simulation, independent of the road network."""
+    name: str
+    vehicles: list = field(default_factory=list)  # VehicleGroups, routed in order
+    rsus: RSUGroup = field(default_factory=RSUGroup)
+    duration: float = 10.0  # Simulated seconds
+    dt: float = 0.01
+    seed: int = None  # Randomises paths and send phases for Monte Carlo runs; None keeps the scripts' layout
+    icons: dict = field(default_factory=lambda: dict(ICON_FILES))  # Drawn in a window, as in load_icons
+
+    def replace(self, **changes):
+        """Copy with some fields changed, e.g. for a sweep."""
+        return replace(self, **changes)
+
+    def build(self, network, router=None, log=None):
+        sim = Simulation(network.world_xy, dt=self.dt, log=log)
+        router = router if router is not None else Router(network)  # An empty Router is falsy
+        rng = None if self.seed is None else np.random.default_rng(self.seed)
+        start = 0
+        for group in self.vehicles:
+            cls = MaliciousVehicle if group.malicious else LegitimateVehicle
+            paths = _pooled_paths(router, start, group.count, group.stride, rng)
+            add_vehicles(sim, cls, paths, OFFSETS if group.offsets else None, group.rate, rng)
+            start += min(group.count, PATH_POOL)
+        # The scripts measured range on screen, so it scales with the map
+        spec = replace(self.rsus, comm_range=_viewport(network).to_world_distance(self.rsus.comm_range))
+        for rid, (x, y) in enumerate(_rsu_positions(network, spec.count)):
+            sim.add_rsu(make_rsu(sim, spec, rid, x, y))
+        return sim
+
+    def run(self, network, router=None, log=None):
+        """Build and run headlessly; returns the finished Simulation."""
+        return self.build(network, router, log).run(self.duration)
+
+
+def make_rsu(sim, spec, rid, x, y):
+    """One RSU of an RSUGroup, at (x, y) in metres."""
+    if spec.kind == 'ledger':
+        detector = DETECTORS[spec.detector](**(spec.detector_options or {}))
+        return LedgerRSU(rid, x, y, comm_range=spec.comm_range, detector=detector, ledger=Ledger(**(spec.ledger or {})))
+    if spec.kind == 'queue':
+        queue = dict(spec.queue or {})
+        if queue.get('policy') == 'priority':
+            # Legitimate vehicles hold enrolled credentials; the flooding vehicles do not
+            queue.setdefault('authenticated', [v.key for v in sim.vehicles if not v.is_malicious])
+        return QueueingRSU(rid, x, y, comm_range=spec.comm_range, **queue)
+    if spec.kind == 'capacity':
+        return RSU(rid, x, y, comm_range=spec.comm_range, max_messages=spec.max_messages)
+    raise ValueError(f"unknown RSU kind {spec.kind!r}")
+
+
+def run_scenarios(scenarios, network, router=None, log=None):
+    """Run several scenarios on one loaded network and router; returns {name: report}."""
+    router = router if router is not None else Router(network)  # An empty Router is falsy
+    return {scenario.name: scenario.run(network, router, log).report() for scenario in scenarios}
+
+
+def _waypoints(router, i, stride):
+    """Node i and the nodes `stride` and 2 * `stride` after it, wrapping around small maps."""
+    n = router.network.num_nodes
+    return [i % n, (i + stride) % n, (i + 2 * stride) % n]
+
+
+def _paths(router, start, stop, stride):
+    """Looping road paths through the three waypoints the scripts picked in graph order."""
+    return [router.route_via(_waypoints(router, i, stride)) for i in range(start, stop)]
+
+
+def _pooled_paths(router, start, count, stride, rng=None):
+    """`count` paths cycling through at most PATH_POOL routed ones, so large fleets do not route every vehicle.
+
+    With an rng the first waypoints are drawn at random instead of taken in graph order.
+    """
+    size = min(count, PATH_POOL)
+    if rng is None:
+        pool = _paths(router, start, start + size, stride)
+    else:
+        starts = rng.integers(0, max(router.network.num_nodes - 2 * stride, 1), size).tolist()
+        pool = [router.route_via(_waypoints(router, i, stride)) for i in starts]
+    return [pool[i % len(pool)] for i in range(count)]
+
+
+def _viewport(network):
+    return network.viewport(SCREEN_WIDTH, SCREEN_HEIGHT)
+
+
+def _rsu_position(network):
+    return _viewport(network).to_world(*RSU_SCREEN_POSITION)
+
+
+def _rsu_positions(network, count):
+    """The scripts' RSU position, then grid sites spread over the map for any further RSUs."""
+    positions = [_rsu_position(network)]
+    if count > 1:
+        area = (network.max_x - network.min_x) * (network.max_y - network.min_y)
+        positions += rsu_sites(network, max(area / (count - 1), 1.0) ** 0.5)[:count - 1]
+    return positions
+
+
+def rsu_sites(network, spacing):
+    """RSU positions on a regular grid over the map, each moved onto its nearest road node."""
+    xs = np.arange(network.min_x + spacing / 2, network.max_x, spacing)
+    ys = np.arange(network.min_y + spacing / 2, network.max_y, spacing)
+    grid = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+    nodes = set()
+    for x, y in grid.tolist():
+        nodes.add(int(np.hypot(network.world_xy[:, 0] - x, network.world_xy[:, 1] - y).argmin()))
+    return [tuple(network.world_xy[node].tolist()) for node in sorted(nodes)]
+
+
+def add_vehicles(sim, cls, paths, offsets=None, rate=None, rng=None):
+    """Add one `cls` vehicle per path; `rate` overrides the class's packets per second.
+
+    With an rng each vehicle's first packet goes out at a random phase of its send interval.
+    The fleet rows are added in one batch; the Vehicle objects are views of them.
+    """
+    shifts = np.asarray(offsets, dtype=np.float64)[np.arange(len(paths)) % len(offsets)] if offsets else None
+    ids = sim.fleet.add_many(paths, shifts, DEFAULT_SPEED, issubclass(cls, MaliciousVehicle))
+    vehicles = []
+    for vid, path in zip(ids.tolist(), paths):
+        vehicle = cls(sim.fleet, path, vid=vid)
+        if rate is not None:
+            vehicle.send_interval = 1.0 / rate
+        delay = None if rng is None else rng.uniform(0.0, vehicle.send_interval)
+        vehicles.append(sim.add_vehicle(vehicle, delay))
+    return vehicles
+
+
+def load_icons(images, files=ICON_FILES):
+    """Icon images {name: (filename, size)} from directory `images`; missing files fall back to placeholders."""
+    from .render import load_icon
+
+    icons = {}
+    for name, (filename, size) in files.items():
+        path = os.path.join(images, filename)
+        if os.path.exists(path):
+            icons[name] = load_icon(path, size)
+    return icons
+
+
+def main(scenario, argv=None):
+    """Command line of a scenario file: a window by default, as the original scripts, or --headless."""
+    parser = argparse.ArgumentParser(description=f'Run the {scenario.name} scenario.')
+    parser.add_argument('--osm', default=DEFAULT_OSM_FILE, help='OSM road network file')
+    parser.add_argument('--duration', type=float, default=scenario.duration, help='Simulated seconds to run')
+    parser.add_argument('--headless', action='store_true', help='Run without a window, as fast as possible')
+    parser.add_argument('--images', default=DEFAULT_IMAGES, help='Directory of the vehicle and RSU icons')
+    parser.add_argument('--fps', type=int, default=30, help='Display frame rate')
+    parser.add_argument('--log-level', choices=sorted(LEVELS), default='notice', help='Event log verbosity')
+    args = parser.parse_args(argv)
+
+    network = load_road_network(args.osm)
+    with EventLog(level=LEVELS[args.log_level]) as log:
+        sim = scenario.build(network, log=log)
+        if args.headless:
+            sim.run(args.duration)
+        else:
+            show(sim, network, args.duration, f'Vehicle Simulation - {scenario.name}', fps=args.fps,
+                 images=args.images, icon_files=scenario.icons)
+    sim.print_diagnostics()
+    return sim
+
+
+def show(sim, network, duration, title, fps=30, ticks_per_frame=None, speed=1.0, images=None, icon_files=ICON_FILES):
+    """Watch a simulation in a pygame window; pygame is only imported here."""
+    import pygame
+
+    from .render import Renderer, Viewer
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption(title)
+    # Images convert to the display format, so they load after set_mode
+    icons = load_icons(images, icon_files) if images else None
+    renderer = Renderer(sim, network, screen, network.viewport(SCREEN_WIDTH, SCREEN_HEIGHT), icons)
+    Viewer(renderer, fps=fps, ticks_per_frame=ticks_per_frame, speed=speed).run(duration)
+    pygame.quit()
@@ -0,0 +1,122 @@
+"""The Baseline, DDoS and BRSUM scenarios as keyword-configurable builders, plus city-wide multi-RSU variants.
+
+Each builder takes a road network and returns a ready Simulation; the
+script scenarios are built from ``Scenario`` descriptions (see
+vanetsim.scenario), whose defaults reproduce the original scripts.
+"""
+import numpy as np
+
+from .coverage import DEFAULT_INTERVAL, load_coverage
+from .engine import Simulation
+from .model import LegitimateVehicle, MaliciousVehicle
+from .routing import Router, random_trips
+from .scenario import RSUGroup, Scenario, VehicleGroup, add_vehicles, make_rsu, rsu_sites
+from .traces import SNAP_DISTANCE, TraceMobility
+
+
+def baseline(vehicles=5, rsus=1, legitimate_rate=None, comm_range=300, max_messages=2500, queue=None, seed=None):
+    """Five legitimate vehicles and one capacity-limited RSU, or `vehicles` and `rsus` of them."""
+    return Scenario('baseline', [VehicleGroup(vehicles, rate=legitimate_rate, offsets=True)],
+                    _capacity_rsus(rsus, comm_range, max_messages, queue), seed=seed)
+
+
+def ddos(vehicles=5, attackers=5, attack_rate=None, rsus=1, legitimate_rate=None, comm_range=300, max_messages=2500,
+         queue=None, seed=None):
+    """Five flooding vehicles and five legitimate vehicles against one capacity-limited RSU.
+
+    `attack_rate` and `legitimate_rate` override the packets per second of
+    each kind of vehicle (10000 and 20).
+    """
+    return Scenario('ddos', _attacked_fleet(vehicles, attackers, attack_rate, legitimate_rate),
+                    _capacity_rsus(rsus, comm_range, max_messages, queue), seed=seed)
+
+
+def brsum(vehicles=5, attackers=5, attack_rate=None, rsus=1, legitimate_rate=None, comm_range=300,
+          detector='token-bucket', detector_options=None, ledger=None, seed=None):
+    """The DDoS scenario against BRSUM ledger RSUs that revoke attacker keys."""
+    rsu_group = RSUGroup(rsus, 'ledger', comm_range, detector=detector, detector_options=detector_options,
+                         ledger=ledger)
+    return Scenario('brsum', _attacked_fleet(vehicles, attackers, attack_rate, legitimate_rate), rsu_group, seed=seed)
+
+
+def _attacked_fleet(vehicles, attackers, attack_rate, legitimate_rate):
+    """The scripts' fleet: attackers on consecutive paths, then legitimate vehicles on spread-out ones."""
+    return [VehicleGroup(attackers, malicious=True, rate=attack_rate, stride=1),
+            VehicleGroup(vehicles, rate=legitimate_rate, offsets=True)]
+
+
+def _capacity_rsus(count, comm_range, max_messages, queue):
+    if queue is None:
+        return RSUGroup(count, 'capacity', comm_range, max_messages)
+    return RSUGroup(count, 'queue', comm_range, queue=queue)
+
+
+def _builder(describe):
+    """Builder taking (network, dt, router, log, **options) for a function describing a Scenario."""
+    def build(network, dt=0.01, router=None, log=None, **options):
+        return describe(**options).replace(dt=dt).build(network, router, log)
+    build.__name__ = f'build_{describe.__name__}'
+    build.__doc__ = describe.__doc__
+    return build
+
+
+build_baseline = _builder(baseline)
+build_ddos = _builder(ddos)
+build_brsum = _builder(brsum)
+
+
+def build_city(network, dt=0.01, router=None, log=None, spacing=500.0, vehicles=50, attackers=5, seed=0,
+               coverage_interval=DEFAULT_INTERVAL, detector='token-bucket', ledger=None, replicate=True, gossip=None,
+               detector_options=None):
+    """Legitimate traffic and flooding vehicles on random trips across a grid of ledger RSUs.
+
+    RSU range lookups use a coverage table cached with the map unless
+    coverage_interval is None. With replicate set, RSUs gossip revocations
+    to each other; `gossip` holds GossipNetwork keyword arguments.
+    """
+    sim = Simulation(network.world_xy, dt=dt, log=log)
+    router = router if router is not None else Router(network)  # An empty Router is falsy
+    trips = random_trips(network, vehicles + attackers, np.random.default_rng(seed))
+    router.precompute(trips + [(d, o) for o, d in trips])  # Both legs of every loop, in a pool for large fleets
+    paths = [router.route_via(trip) for trip in trips]
+    add_vehicles(sim, MaliciousVehicle, paths[:attackers])
+    add_vehicles(sim, LegitimateVehicle, paths[attackers:])
+    spec = RSUGroup(kind='ledger', detector=detector, detector_options=detector_options, ledger=ledger)
+    for rid, (x, y) in enumerate(rsu_sites(network, spacing)):
+        sim.add_rsu(make_rsu(sim, spec, rid, x, y))
+    if coverage_interval is not None:
+        points = [(rsu.x, rsu.y) for rsu in sim.rsus]
+        ranges = [rsu.comm_range for rsu in sim.rsus]
+        sim.use_coverage(load_coverage(network, points, ranges, coverage_interval), network)
+    if replicate:
+        sim.use_gossip(**(gossip or {}))
+    return sim
+
+
+def build_trace(network, dt=0.01, router=None, log=None, trace=None, attackers=0.1, seed=0, geo=False,
+                snap_distance=SNAP_DISTANCE, spacing=500.0, detector='token-bucket', ledger=None, replicate=True,
+                gossip=None, detector_options=None):
+    """Vehicles of an FCD trace file, a seeded `attackers` fraction of them flooding, across a grid of ledger RSUs.
+
+    The trace is streamed while the simulation runs; `geo` says its
+    positions are lon/lat rather than metres in the network's frame.
+    """
+    if trace is None:
+        raise ValueError("the trace scenario needs a trace file")
+    sim = Simulation(network.world_xy, dt=dt, log=log)
+    spec = RSUGroup(kind='ledger', detector=detector, detector_options=detector_options, ledger=ledger)
+    for rid, (x, y) in enumerate(rsu_sites(network, spacing)):
+        sim.add_rsu(make_rsu(sim, spec, rid, x, y))
+    sim.use_mobility(TraceMobility(sim, network, trace, attackers, seed, geo, snap_distance=snap_distance))
+    if replicate:
+        sim.use_gossip(**(gossip or {}))
+    return sim
+
+
+SCENARIOS = {
+    'baseline': build_baseline,
+    'ddos': build_ddos,
+    'brsum': build_brsum,
+    'city': build_city,
+    'trace': build_trace,
+}
@@ -0,0 +1,139 @@
+"""Uniform grid index for vehicle-to-RSU association with many RSUs.
+
+RSUs never move, so the area they cover is split once into square cells
+and each cell lists the RSUs whose range reaches into it. A cell with no
+candidates is out of range everywhere, and a cell that lies wholly inside
+the range of its only candidate always associates with that RSU; vehicles
+in those cells keep their association from earlier ticks for as long as
+they stay in the same cell. Only vehicles in the remaining boundary cells
+are distance-checked each tick, and only against their cell's few
+candidates instead of every RSU.
+"""
+import math
+
+import numpy as np
+
+MIXED = -2  # Cell state: association depends on the position inside the cell
+
+
+class RSUGrid:
+    """Static grid over RSU coverage, with per-vehicle association kept incrementally."""
+
+    def __init__(self, points, ranges, cell_size=None):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.ranges = np.broadcast_to(np.asarray(ranges, dtype=np.float64), (len(self.points),)).copy()
+        if cell_size is None:
+            # Half the smallest range keeps boundary cells a small share of the covered area
+            cell_size = max(self.ranges.min() / 2, 1.0) if len(self.ranges) else 1.0
+        self.cell_size = float(cell_size)
+        if len(self.points):
+            self.origin = (self.points - self.ranges[:, None]).min(axis=0)
+            extent = (self.points + self.ranges[:, None]).max(axis=0) - self.origin
+        else:
+            self.origin, extent = np.zeros(2), np.zeros(2)
+        self.nx, self.ny = (max(1, math.ceil(e / self.cell_size)) for e in extent)
+        self._build_cells()
+
+        self._cell = np.zeros(0, dtype=np.int64)  # Vehicle id -> cell it was last seen in
+        self.association = np.zeros(0, dtype=np.int64)  # Vehicle id -> RSU index or -1
+        self.reused = 0  # Associations carried over from an earlier tick
+        self.computed = 0  # Associations looked up or distance-checked
+
+    def _build_cells(self):
+        """Find the candidate RSUs of every cell and resolve the cells that need no distance check."""
+        size = self.cell_size
+        candidates = [[] for _ in range(self.nx * self.ny)]
+        full = np.zeros(self.nx * self.ny, dtype=bool)
+        for r, ((x, y), reach) in enumerate(zip(self.points.tolist(), self.ranges.tolist())):
+            ix0, iy0 = self._clamped_cell(x - reach, y - reach)
+            ix1, iy1 = self._clamped_cell(x + reach, y + reach)
+            ix, iy = np.meshgrid(np.arange(ix0, ix1 + 1), np.arange(iy0, iy1 + 1), indexing='ij')
+            ix, iy = ix.ravel(), iy.ravel()
+            x0 = self.origin[0] + ix * size
+            y0 = self.origin[1] + iy * size
+            # Nearest and farthest points of each cell rectangle from the RSU
+            near = np.hypot(np.clip(x, x0, x0 + size) - x, np.clip(y, y0, y0 + size) - y)
+            far = np.hypot(np.maximum(abs(x - x0), abs(x - x0 - size)), np.maximum(abs(y - y0), abs(y - y0 - size)))
+            cells = ix * self.ny + iy
+            reached = near < reach
+            for cell in cells[reached].tolist():
+                candidates[cell].append(r)
+            full[cells[reached & (far < reach)]] = True  # Only trusted below if r is the sole candidate
+
+        width = max((len(c) for c in candidates), default=0)
+        self.candidates = np.full((len(candidates), max(width, 1)), -1, dtype=np.int64)
+        self.state = np.full(len(candidates), MIXED, dtype=np.int64)  # Resolved RSU index, -1 or MIXED
+        for cell, rsus in enumerate(candidates):
+            self.candidates[cell, :len(rsus)] = rsus
+            if not rsus:
+                self.state[cell] = -1
+            elif len(rsus) == 1 and full[cell]:
+                self.state[cell] = rsus[0]
+
+    def _clamped_cell(self, x, y):
+        ix = int((x - self.origin[0]) // self.cell_size)
+        iy = int((y - self.origin[1]) // self.cell_size)
+        return min(max(ix, 0), self.nx - 1), min(max(iy, 0), self.ny - 1)
+
+    def cells_of(self, pos):
+        """Flat cell index of each (x, y) position, or -1 outside the grid."""
+        ij = np.floor((np.asarray(pos, dtype=np.float64) - self.origin) / self.cell_size).astype(np.int64)
+        inside = (ij[:, 0] >= 0) & (ij[:, 0] < self.nx) & (ij[:, 1] >= 0) & (ij[:, 1] < self.ny)
+        return np.where(inside, ij[:, 0] * self.ny + ij[:, 1], -1)
+
+    def nearest(self, pos, cells=None):
+        """Closest RSU within range of each position, checking only the candidates of its cell."""
+        pos = np.asarray(pos, dtype=np.float64).reshape(-1, 2)
+        cells = self.cells_of(pos) if cells is None else cells
+        result = np.full(len(pos), -1, dtype=np.int64)
+        inside = cells >= 0
+        if not inside.any() or not len(self.points):
+            return result
+        candidates = self.candidates[cells[inside]]
+        valid = candidates >= 0
+        points = self.points[candidates]  # Padding (-1) reads the last RSU and is masked out below
+        distance = np.hypot(points[..., 0] - pos[inside, None, 0], points[..., 1] - pos[inside, None, 1])
+        distance[~valid | (distance >= self.ranges[candidates])] = np.inf
+        best = distance.argmin(axis=1)  # Candidates are in RSU order, so ties go to the lowest index
+        rows = np.arange(len(best))
+        result[inside] = np.where(np.isinf(distance[rows, best]), -1, candidates[rows, best])
+        return result
+
+    def covering(self, pos, cells=None):
+        """Every RSU whose range covers each position, as CSR (indptr, RSU indices) in RSU order."""
+        pos = np.asarray(pos, dtype=np.float64).reshape(-1, 2)
+        cells = self.cells_of(pos) if cells is None else cells
+        if not len(self.points):
+            return np.zeros(len(pos) + 1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        candidates = np.where((cells >= 0)[:, None], self.candidates[cells], -1)
+        points = self.points[candidates]
+        distance = np.hypot(points[..., 0] - pos[:, None, 0], points[..., 1] - pos[:, None, 1])
+        within = (candidates >= 0) & (distance < self.ranges[candidates])
+        indptr = np.zeros(len(pos) + 1, dtype=np.int64)
+        np.cumsum(within.sum(axis=1), out=indptr[1:])
+        return indptr, candidates[within]
+
+    def update(self, pos):
+        """Refresh and return the association of every vehicle position in `pos`.
+
+        Vehicles that stayed in a resolved cell keep their previous result;
+        the rest are looked up from their cell or distance-checked.
+        """
+        n = len(pos)
+        if len(self._cell) < n:
+            grown = n - len(self._cell)
+            self._cell = np.concatenate([self._cell, np.full(grown, -2, dtype=np.int64)])  # -2: never seen
+            self.association = np.concatenate([self.association, np.full(grown, -1, dtype=np.int64)])
+        cells = self.cells_of(pos)
+        state = np.where(cells >= 0, self.state[cells], -1)
+        stale = (cells != self._cell[:n]) | (state == MIXED)
+        self._cell[:n] = cells
+        self.reused += n - int(stale.sum())
+        self.computed += int(stale.sum())
+
+        stale_ids = np.flatnonzero(stale)
+        self.association[stale_ids] = state[stale_ids]
+        mixed = stale_ids[state[stale_ids] == MIXED]
+        if len(mixed):
+            self.association[mixed] = self.nearest(pos[mixed], cells[mixed])
+        return self.association[:n]
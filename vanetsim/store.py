@@ -0,0 +1,218 @@
+"""Optional SQLite persistence for ledgers, revocations and per-vehicle packet counters.
+
+The database runs in WAL mode, so reads never wait for the writer. Writes
+are buffered in memory and handed in batches to a background thread that
+commits each batch as one transaction. Committed ledger blocks go to disk
+instead of staying in memory, and the revoked-key check on the packet hot
+path goes through ``RevokedKeys``, a bounded in-memory cache in front of the
+revocations table. Revocation lists written by one run can be preloaded
+into the next.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    rsu INTEGER, idx INTEGER, hash BLOB, prev_hash BLOB, merkle_root BLOB, sealed REAL, committed REAL,
+    PRIMARY KEY (rsu, idx));
+CREATE TABLE IF NOT EXISTS transactions (
+    rsu INTEGER, block INTEGER, position INTEGER, kind TEXT, key TEXT, time REAL,
+    PRIMARY KEY (rsu, block, position));
+CREATE TABLE IF NOT EXISTS revocations (
+    rsu INTEGER, key TEXT, time REAL, adopted INTEGER, PRIMARY KEY (rsu, key));
+CREATE TABLE IF NOT EXISTS counters (
+    vid INTEGER PRIMARY KEY, key TEXT, malicious INTEGER, sent INTEGER, received INTEGER, time REAL);
+"""
+_INSERT_BLOCK = "INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?, ?, ?, ?)"
+_INSERT_TRANSACTION = "INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?, ?)"
+_INSERT_REVOCATION = "INSERT OR IGNORE INTO revocations VALUES (?, ?, ?, ?)"
+_UPSERT_COUNTERS = "INSERT OR REPLACE INTO counters VALUES (?, ?, ?, ?, ?, ?)"
+
+
+class LedgerStore:
+    """SQLite database written in batches from a background thread."""
+
+    def __init__(self, path, batch_size=4096):
+        self.path = path
+        self.batch_size = batch_size  # Rows buffered before a batch is handed to the writer
+        self._reader = sqlite3.connect(path, check_same_thread=False)
+        self._reader.execute("PRAGMA journal_mode=WAL")
+        self._reader.executescript(SCHEMA)
+        self._reader.commit()
+        self._batch = []  # (statement, row) pairs not yet handed off
+        self._unflushed = set()  # (rsu, key) of revocations not yet committed
+        self._error = None  # Exception that stopped the writer, raised again by flush()
+        self._queue = queue.Queue(maxsize=16)  # Bounded, so a slow disk applies back-pressure
+        self._thread = threading.Thread(target=self._write_batches, name='vanetsim-store', daemon=True)
+        self._thread.start()
+        self.rows_written = 0
+
+    def _write_batches(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA synchronous=NORMAL")  # Safe in WAL mode; commits skip the fsync
+        try:
+            while True:
+                batch = self._queue.get()
+                try:
+                    if batch is None:
+                        return
+                    if self._error is None:  # After a failure, later batches are discarded
+                        with conn:  # One transaction per batch
+                            for statement, rows in _group(batch):
+                                conn.executemany(statement, rows)
+                        self.rows_written += len(batch)
+                        self._unflushed.difference_update((rsu, key) for statement, (rsu, key, *_) in batch
+                                                          if statement is _INSERT_REVOCATION)
+                except Exception as error:
+                    self._error = error
+                finally:
+                    self._queue.task_done()
+        finally:
+            conn.close()
+
+    def _write(self, statement, row):
+        self._batch.append((statement, row))
+        if len(self._batch) >= self.batch_size:
+            self._hand_off()
+
+    def _hand_off(self):
+        self._queue.put(self._batch)
+        self._batch = []
+
+    def flush(self):
+        """Hand off buffered rows and wait until they are committed."""
+        if self._batch:
+            self._hand_off()
+        self._queue.join()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+                self._reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_block(self, rsu, block):
+        self._write(_INSERT_BLOCK, (rsu, block.index, block.hash, block.prev_hash, block.merkle_root,
+                                    block.sealed, block.committed))
+        for position, (kind, key, time) in enumerate(block.transactions):
+            self._write(_INSERT_TRANSACTION, (rsu, block.index, position, kind, key, time))
+
+    def add_revocation(self, rsu, key, time, adopted=False):
+        self._unflushed.add((rsu, key))
+        self._write(_INSERT_REVOCATION, (rsu, key, time, int(adopted)))
+
+    def save_counters(self, sim):
+        """Write every vehicle's packet counters as of the simulation's current time."""
+        now = sim.now
+        for vehicle in sim.vehicles:
+            self._write(_UPSERT_COUNTERS, (vehicle.vid, vehicle.key, int(vehicle.is_malicious),
+                                           vehicle.sent_packets, vehicle.received_packets, now))
+
+    def is_revoked(self, rsu, key):
+        """Read the revocations table; a revocation still waiting to be written is not looked up."""
+        if (rsu, key) in self._unflushed:
+            return True
+        row = self._reader.execute("SELECT 1 FROM revocations WHERE rsu = ? AND key = ?", (rsu, key)).fetchone()
+        return row is not None
+
+    def revocation_count(self, rsu):
+        self.flush()
+        return self._reader.execute("SELECT COUNT(*) FROM revocations WHERE rsu = ?", (rsu,)).fetchone()[0]
+
+    def revoked_keys(self, rsu=None):
+        """Keys revoked at one RSU, or at any RSU, e.g. to preload the next scenario."""
+        self.flush()
+        if rsu is None:
+            rows = self._reader.execute("SELECT DISTINCT key FROM revocations")
+        else:
+            rows = self._reader.execute("SELECT key FROM revocations WHERE rsu = ?", (rsu,))
+        return {key for key, in rows}
+
+    def blocks(self, rsu):
+        """Stream one RSU's committed blocks in order as (index, prev_hash, transactions, sealed, committed, hash)."""
+        self.flush()
+        blocks = self._reader.execute(
+            "SELECT idx, prev_hash, sealed, committed, hash FROM blocks WHERE rsu = ? ORDER BY idx", (rsu,))
+        for index, prev_hash, sealed, committed, block_hash in blocks:
+            transactions = [tuple(row) for row in self._reader.execute(
+                "SELECT kind, key, time FROM transactions WHERE rsu = ? AND block = ? ORDER BY position",
+                (rsu, index))]
+            yield index, prev_hash, transactions, sealed, committed, block_hash
+
+    def stats(self):
+        """Row counts and on-disk size, to follow ledger growth over long runs."""
+        self.flush()
+        counts = {table: self._reader.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ('blocks', 'transactions', 'revocations', 'counters')}
+        size = sum(os.path.getsize(self.path + suffix) for suffix in ('', '-wal') if os.path.exists(self.path + suffix))
+        counts['bytes'] = size
+        return counts
+
+
+def _group(batch):
+    """Consecutive rows for the same statement, so each group is one executemany call."""
+    statement, rows = None, []
+    for row_statement, row in batch:
+        if row_statement != statement:
+            if rows:
+                yield statement, rows
+            statement, rows = row_statement, []
+        rows.append(row)
+    if rows:
+        yield statement, rows
+
+
+class RevokedKeys:
+    """Set-like revoked-key index for one RSU: an LRU cache in front of the revocations table.
+
+    Hits, positive or negative, never touch the database; only keys not
+    seen recently are read through from disk. Writes go to the cache and to
+    the store's write batch.
+    """
+
+    def __init__(self, store, rsu, cache_size=65536):
+        self.store = store
+        self.rsu = rsu
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # Key -> revoked, in LRU order
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        cache = self._cache
+        if key in cache:
+            self.hits += 1
+            cache.move_to_end(key)
+            return cache[key]
+        self.misses += 1
+        revoked = self.store.is_revoked(self.rsu, key)
+        self._remember(key, revoked)
+        return revoked
+
+    def __len__(self):
+        return self.store.revocation_count(self.rsu)
+
+    def _remember(self, key, revoked):
+        self._cache[key] = revoked
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def add(self, key, time=None, adopted=False):
+        self._remember(key, True)
+        self.store.add_revocation(self.rsu, key, time, adopted)
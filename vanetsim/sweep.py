@@ -0,0 +1,254 @@
+"""Parameter sweeps and Monte Carlo runs of the headless scenarios across worker processes.
+
+    python -m vanetsim.sweep brsum --osm map.osm --grid detector_options.burst=10,50,200 --runs 20
+
+Every point of a parameter grid, or of a random sample of a parameter
+space, is run with a series of seeds. Runs fan out over a process pool
+whose workers memory-map the cached road network, so the arrays are shared
+read-only instead of pickled to every process, and each worker keeps its
+own route cache across runs. Per-run report metrics are aggregated per
+point into a mean and a 95% confidence interval. With a tolerance set, a
+point stops getting new seeds once the interval of the target metric is
+within that fraction of its mean.
+
+Dotted parameter names address nested options, e.g. ``ledger.block_size``
+or ``queue.service_rate``.
+"""
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from .eventlog import QUIET, EventLog
+from .roads import DEFAULT_OSM_FILE, RoadNetwork, load_road_network
+from .routing import Router
+from .scenarios import SCENARIOS
+
+# Two-sided 95% Student t critical values by degrees of freedom; the normal value beyond the table
+_T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+        2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def t95(df):
+    return _T95[df - 1] if df <= len(_T95) else 1.96
+
+
+def confidence_interval(values):
+    """Mean and 95% half-width of a list of per-run values; the half-width is inf below two runs."""
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, math.inf
+    std = math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1))
+    return mean, t95(n - 1) * std / math.sqrt(n)
+
+
+def grid(axes):
+    """Every combination of {name: [values]}, as a list of parameter dicts."""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def sample(space, count, seed=0):
+    """`count` random points of {name: (low, high) for a uniform float, or [choices]}."""
+    rng = np.random.default_rng(seed)
+    points = []
+    for _ in range(count):
+        point = {}
+        for name, domain in space.items():
+            if isinstance(domain, tuple):
+                point[name] = float(rng.uniform(*domain))
+            else:
+                point[name] = domain[int(rng.integers(len(domain)))]
+        points.append(point)
+    return points
+
+
+def nest(params):
+    """Turn dotted names into nested keyword dicts: {'ledger.block_size': 8} -> {'ledger': {'block_size': 8}}."""
+    options = {}
+    for name, value in params.items():
+        target = options
+        *parents, leaf = name.split('.')
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = value
+    return options
+
+
+_worker_network = None
+_worker_router = None
+
+
+def _init_worker(source):
+    global _worker_network, _worker_router
+    _worker_network = RoadNetwork.load(source) if isinstance(source, str) else source
+    # Routes computed by one run are reused by the next; no nested pools inside the sweep's workers
+    _worker_router = Router(_worker_network, workers=1)
+
+
+def run_once(network, router, scenario, params, seed, duration, dt):
+    """Run one scenario with `params` and `seed` and return its numeric report values."""
+    sim = SCENARIOS[scenario](network, dt=dt, router=router, log=EventLog(level=QUIET), seed=seed, **nest(params))
+    sim.run(duration)
+    return {name: value for name, value in sim.report().items() if isinstance(value, (int, float))}
+
+
+def _run(scenario, params, seed, duration, dt):
+    return run_once(_worker_network, _worker_router, scenario, params, seed, duration, dt)
+
+
+class Point:
+    """Runs of one parameter point and their aggregate."""
+
+    def __init__(self, params, target):
+        self.params = params
+        self.runs = []  # Report dicts, one per finished seed
+        self.seeds = 0  # Seeds handed out so far; seed n is the n-th
+        self.target = target  # Seeds to hand out before deciding whether more are needed
+        self.done = False
+
+    @property
+    def pending(self):
+        return self.seeds - len(self.runs)
+
+    def summary(self):
+        """{metric: (mean, 95% half-width)} over the finished runs."""
+        names = sorted(set().union(*self.runs)) if self.runs else []
+        return {name: confidence_interval([run.get(name, 0) for run in self.runs]) for name in names}
+
+    def settle(self, max_runs, metric, tolerance):
+        """Once every handed-out seed has finished, stop or ask for one more seed."""
+        runs = len(self.runs)
+        if self.pending or runs < self.target:
+            return
+        if tolerance is None or runs >= max_runs:
+            self.done = True
+            return
+        mean, half_width = confidence_interval([run.get(metric, 0) for run in self.runs])
+        self.done = half_width <= tolerance * abs(mean)
+        if not self.done:
+            self.target += 1
+
+
+def sweep(network, scenario, points, duration=10.0, dt=0.01, min_runs=3, max_runs=30, metric=None, tolerance=None,
+          workers=None, on_point=None):
+    """Run every point with seeds 0, 1, ... and return one Point per parameter dict, in order.
+
+    Each point gets at least `min_runs` seeds. With `metric` and
+    `tolerance` set it then gets one more at a time, up to `max_runs`,
+    until the 95% interval of the metric is within `tolerance` times its
+    mean; without them every point runs `max_runs` seeds. `on_point` is
+    called with each point as it finishes.
+    """
+    if tolerance is not None and metric is None:
+        raise ValueError("early stopping needs the metric its tolerance applies to")
+    points = [Point(params, max_runs if tolerance is None else min(min_runs, max_runs)) for params in points]
+    source = network.cache_dir or network  # Workers memory-map the cached arrays when there are any
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(source,)) as pool:
+        running = {}
+        while True:
+            # Hand out seeds in point order, keeping about two runs per worker in flight
+            for point in points:
+                while not point.done and point.seeds < point.target and len(running) < 2 * workers:
+                    future = pool.submit(_run, scenario, point.params, point.seeds, duration, dt)
+                    running[future] = point
+                    point.seeds += 1
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                point = running.pop(future)
+                point.runs.append(future.result())
+                point.settle(max_runs, metric, tolerance)
+                if point.done and on_point is not None:
+                    on_point(point)
+    return points
+
+
+def write_results(path, points):
+    """One CSV row per point: its parameters, run count, then mean and half-width of every metric."""
+    params = sorted(set().union(*(point.params for point in points)))
+    summaries = [point.summary() for point in points]
+    metrics = sorted(set().union(*summaries))
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(params + ['runs'] + [f"{name}{suffix}" for name in metrics for suffix in ('', '_ci95')])
+        for point, summary in zip(points, summaries):
+            row = [point.params.get(name, '') for name in params] + [len(point.runs)]
+            for name in metrics:
+                row.extend(summary.get(name, ('', '')))
+            writer.writerow(row)
+
+
+def _axis(text):
+    """Parse NAME=V1,V2,... with JSON values, falling back to strings."""
+    name, _, values = text.partition('=')
+    if not name or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=V1,V2,..., got {text!r}")
+    return name, [_value(value) for value in values.split(',')]
+
+
+def _range(text):
+    """Parse NAME=LOW:HIGH for a uniform range."""
+    name, _, bounds = text.partition('=')
+    low, _, high = bounds.partition(':')
+    try:
+        return name, (float(low), float(high))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME=LOW:HIGH, got {text!r}") from None
+
+
+def _value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep scenario parameters over seeds across CPU cores.')
+    parser.add_argument('scenario', choices=sorted(SCENARIOS))
+    parser.add_argument('--osm', default=DEFAULT_OSM_FILE, help='OSM road network file')
+    parser.add_argument('--grid', type=_axis, action='append', default=[], metavar='NAME=V1,V2,...',
+                        help='Grid axis; repeat for a full factorial grid over several parameters')
+    parser.add_argument('--uniform', type=_range, action='append', default=[], metavar='NAME=LOW:HIGH',
+                        help='Range to sample uniformly instead of a grid; see --samples')
+    parser.add_argument('--samples', type=int, default=20, help='Random points drawn from the --uniform ranges')
+    parser.add_argument('--sample-seed', type=int, default=0, help='Seed of the random parameter sample')
+    parser.add_argument('--runs', type=int, default=10, help='Seeds per point, the most with --tolerance')
+    parser.add_argument('--min-runs', type=int, default=3, help='Seeds per point before early stopping is considered')
+    parser.add_argument('--metric', default='legitimate_received', help='Report metric early stopping watches')
+    parser.add_argument('--tolerance', type=float,
+                        help='Stop a point once the 95%% interval of --metric is within this fraction of its mean')
+    parser.add_argument('--duration', type=float, default=10.0, help='Simulated seconds per run')
+    parser.add_argument('--dt', type=float, default=0.01, help='Simulated seconds per tick')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--output', default='sweep.csv', help='CSV file of per-point means and intervals')
+    args = parser.parse_args(argv)
+
+    points = grid(dict(args.grid))
+    if args.uniform:
+        sampled = sample(dict(args.uniform), args.samples, args.sample_seed)
+        points = [dict(fixed, **drawn) for fixed in points for drawn in sampled]
+    network = load_road_network(args.osm)
+
+    def report(point):
+        mean, half_width = point.summary().get(args.metric, (math.nan, math.nan))
+        print(f"{json.dumps(point.params, sort_keys=True)}: {args.metric} {mean:.2f} +/- {half_width:.2f} "
+              f"({len(point.runs)} runs)")
+
+    results = sweep(network, args.scenario, points, args.duration, args.dt, args.min_runs, args.runs, args.metric,
+                    args.tolerance, args.workers, on_point=report)
+    write_results(args.output, results)
+    print(f"Wrote {len(results)} points to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
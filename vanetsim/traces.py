@@ -0,0 +1,286 @@
+"""Streaming import of floating-car-data traces (SUMO FCD XML or CSV) as a mobility source.
+
+Traces are read one timestep at a time: XML through ``iterparse``, clearing
+every element once its timestep is handed over, CSV row by row grouped on
+the time column, so a trace of any size runs in constant memory. Positions
+are snapped onto the nearest road edge of the loaded network through a
+grid index over the edge segments.
+
+``TraceMobility`` feeds the frames into a simulation tick by tick, in place
+of live movement: vehicles are created the first time the trace shows them
+and marked as attackers by a seeded draw, positions are interpolated
+between trace timesteps, and vehicles that leave the trace stop sending
+until they come back. Once the trace is exhausted every vehicle stops.
+"""
+import csv
+import gzip
+import itertools
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from .model import LegitimateVehicle, MaliciousVehicle
+from .roads import project_lonlat
+
+SNAP_DISTANCE = 50.0  # Metres; trace points further than this from every road are left where they are
+PARKED = (-1e9, -1e9)  # Where vehicles absent from the trace wait, outside any RSU's reach
+
+# Time, id, x and y column names of `sumo xml2csv` output, then of plain CSV traces
+CSV_COLUMNS = [('timestep_time', 'vehicle_id', 'vehicle_x', 'vehicle_y'), ('time', 'id', 'x', 'y')]
+
+
+def _open(path):
+    return gzip.open(path, 'rt') if path.endswith('.gz') else open(path, newline='')
+
+
+def read_fcd_xml(path):
+    """Yield (time, ids, xy) per <timestep> of a SUMO FCD export, holding one timestep in memory."""
+    with _open(path) as f:
+        events = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(events)
+        for event, element in events:
+            if event != 'end' or element.tag != 'timestep':
+                continue
+            vehicles = element.findall('vehicle')
+            ids = [vehicle.get('id') for vehicle in vehicles]
+            xy = np.array([(float(vehicle.get('x')), float(vehicle.get('y'))) for vehicle in vehicles],
+                          dtype=np.float64).reshape(-1, 2)
+            yield float(element.get('time')), ids, xy
+            root.clear()  # Drop the finished timestep, and anything before it, from the tree
+
+
+def read_fcd_csv(path):
+    """Yield (time, ids, xy) per timestep of a CSV trace sorted by time, reading it row by row.
+
+    Both `sumo xml2csv` output (';'-separated, timestep_time, vehicle_id,
+    vehicle_x, vehicle_y) and plain time, id, x, y columns are understood.
+    """
+    with _open(path) as f:
+        header = f.readline()
+        delimiter = ';' if header.count(';') > header.count(',') else ','
+        names = next(csv.reader([header], delimiter=delimiter))
+        for columns in CSV_COLUMNS:
+            if all(name in names for name in columns):
+                break
+        else:
+            raise ValueError(f"{path}: expected columns {' or '.join(map(str, CSV_COLUMNS))}")
+        t_col, id_col, x_col, y_col = (names.index(name) for name in columns)
+        current, ids, xs, ys = None, [], [], []
+        for row in csv.reader(f, delimiter=delimiter):
+            if not row or not row[id_col]:
+                continue  # xml2csv writes a row for timesteps without vehicles
+            if row[t_col] != current:
+                if ids:
+                    yield float(current), ids, np.column_stack([np.asarray(xs, dtype=np.float64),
+                                                                np.asarray(ys, dtype=np.float64)])
+                current, ids, xs, ys = row[t_col], [], [], []
+            ids.append(row[id_col])
+            xs.append(row[x_col])
+            ys.append(row[y_col])
+        if ids:
+            yield float(current), ids, np.column_stack([np.asarray(xs, dtype=np.float64),
+                                                        np.asarray(ys, dtype=np.float64)])
+
+
+def read_trace(path):
+    """Frames of an FCD trace, by extension: .xml or .csv, optionally gzipped."""
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith('.xml'):
+        return read_fcd_xml(path)
+    if name.endswith('.csv'):
+        return read_fcd_csv(path)
+    raise ValueError(f"{path}: expected an .xml or .csv trace")
+
+
+class EdgeSnapper:
+    """Snaps points onto the nearest road edge segment within `max_distance`.
+
+    Edges are binned into square cells of side max_distance, each edge
+    into every cell its bounding box reaches once grown by max_distance, so
+    the cell of a point lists every edge it may snap to. Only occupied cells
+    are stored, as sorted keys.
+    """
+
+    def __init__(self, network, max_distance=SNAP_DISTANCE):
+        self.max_distance = max_distance
+        self.cell_size = max(max_distance, 1.0)
+        sources, targets = network.edge_pairs()
+        self.sources = sources  # Start node of each edge
+        self.a = network.world_xy[sources]
+        self.b = network.world_xy[targets]
+        self.origin = network.world_xy.min(axis=0) - max_distance
+        lo = self._cell_xy(np.minimum(self.a, self.b) - max_distance)
+        hi = self._cell_xy(np.maximum(self.a, self.b) + max_distance)
+        self.columns = int(hi[:, 0].max(initial=0)) + 1
+        span = hi - lo + 1
+        counts = span[:, 0] * span[:, 1]
+        edge = np.repeat(np.arange(len(self.a)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = lo[edge, 0] + local % span[edge, 0]
+        cy = lo[edge, 1] + local // span[edge, 0]
+        keys = cy * self.columns + cx
+        order = np.argsort(keys, kind='stable')
+        self.keys, starts = np.unique(keys[order], return_index=True)  # Occupied cells
+        self.cell_ptr = np.append(starts, len(order))
+        self.cell_edges = edge[order]
+
+    def _cell_xy(self, xy):
+        return np.floor((xy - self.origin) / self.cell_size).astype(np.int64)
+
+    def snap(self, xy):
+        """(snapped positions, edge index or -1) for an (n, 2) array of points."""
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        n = len(xy)
+        snapped, edges = xy.copy(), np.full(n, -1, dtype=np.int64)
+        if not n or not len(self.keys):
+            return snapped, edges
+        cell = self._cell_xy(xy)
+        inside = (cell[:, 0] >= 0) & (cell[:, 0] < self.columns) & (cell[:, 1] >= 0)
+        keys = cell[:, 1] * self.columns + cell[:, 0]
+        found = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        hit = inside & (self.keys[found] == keys)
+        points = np.flatnonzero(hit)
+        start, stop = self.cell_ptr[found[hit]], self.cell_ptr[found[hit] + 1]
+        counts = stop - start
+        if not counts.sum():
+            return snapped, edges
+
+        # One row per (point, candidate edge) pair
+        point = np.repeat(points, counts)
+        edge = self.cell_edges[np.repeat(start, counts) + np.arange(counts.sum())
+                               - np.repeat(np.cumsum(counts) - counts, counts)]
+        a, ab = self.a[edge], self.b[edge] - self.a[edge]
+        length2 = (ab ** 2).sum(axis=1)
+        t = np.clip(((xy[point] - a) * ab).sum(axis=1) / np.where(length2 > 0, length2, 1.0), 0.0, 1.0)
+        foot = a + ab * t[:, None]
+        distance = np.hypot(*(xy[point] - foot).T)
+
+        best = np.lexsort((distance, point))  # Closest candidate first within each point
+        first = best[np.r_[True, point[best][1:] != point[best][:-1]]]
+        close = distance[first] <= self.max_distance
+        first = first[close]
+        snapped[point[first]] = foot[first]
+        edges[point[first]] = edge[first]
+        return snapped, edges
+
+
+class TraceMobility:
+    """Moves a simulation's vehicles along a streamed trace instead of simulating movement.
+
+    `frames` is a trace file path or an iterable of (time, ids, xy); only a
+    path can be reopened when the simulation is restored from a checkpoint.
+    """
+
+    def __init__(self, sim, network, frames, attackers=0.0, seed=0, geo=False, offset=(0.0, 0.0),
+                 snap_distance=SNAP_DISTANCE, interpolate=True):
+        self.sim = sim
+        self.network = network
+        self.path = frames if isinstance(frames, str) else None  # Trace file, which a checkpoint reopens
+        self.frames = iter(read_trace(frames) if self.path else frames)  # (time, ids, xy) per trace timestep
+        self.attackers = attackers  # Probability that a newly seen vehicle floods
+        self.rng = np.random.default_rng(seed)
+        self.geo = geo  # Trace positions are (lon, lat) degrees rather than metres
+        self._centre = (network.xy.min(axis=0) + network.xy.max(axis=0)) / 2  # Projection centre of the nodes
+        self.offset = np.asarray(offset, dtype=np.float64)  # Subtracted from metric trace positions
+        self.snapper = EdgeSnapper(network, snap_distance) if snap_distance else None
+        self.interpolate = interpolate
+        self.vehicles = {}  # Trace id -> Vehicle
+        self.frames_read = 0
+        self.points_read = 0
+        self.snapped = 0
+        self._current = None  # (time, vids, xy) being shown
+        self._next = self._read()  # (time, ids, xy) coming up
+        self._shown = np.zeros(0, dtype=np.int64)  # Vehicle ids in the current frame
+        self._pair = None  # Interpolation between the current and next frame
+        self._period = 0.0  # Time between the last two frames, how long the final frame is shown
+
+    def __getstate__(self):
+        if self.path is None:
+            raise TypeError("only a trace read from a file path can be checkpointed")
+        state = self.__dict__.copy()
+        state['frames'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.frames = itertools.islice(read_trace(self.path), self.frames_read, None)  # Skip the frames already read
+
+    def check(self, fleet, dt):
+        pass  # The trace creates its own vehicles
+
+    def _read(self):
+        frame = next(self.frames, None)
+        if frame is None:
+            return None
+        time, ids, xy = frame
+        if self.geo:
+            xy = project_lonlat(xy, self._centre) if len(xy) else xy
+        else:
+            xy = xy - self.offset
+        if self.snapper is not None:
+            xy, edges = self.snapper.snap(xy)
+            self.snapped += int((edges >= 0).sum())
+        else:
+            edges = np.full(len(ids), -1, dtype=np.int64)
+        self.frames_read += 1
+        self.points_read += len(ids)
+        return time, ids, xy, edges
+
+    def _vehicle(self, trace_id, edge):
+        vehicle = self.vehicles.get(trace_id)
+        if vehicle is None:
+            malicious = self.rng.random() < self.attackers
+            cls = MaliciousVehicle if malicious else LegitimateVehicle
+            node = int(self.snapper.sources[edge]) if edge >= 0 else 0  # Placeholder path; the trace moves it
+            vehicle = self.sim.add_vehicle(cls(self.sim.fleet, [node]))
+            self.vehicles[trace_id] = vehicle
+        return vehicle
+
+    def _promote(self):
+        """Make the next frame current: create, show and hide vehicles as the trace says."""
+        time, ids, xy, edges = self._next
+        vids = np.fromiter((self._vehicle(i, edge).vid for i, edge in zip(ids, edges.tolist())), dtype=np.int64,
+                           count=len(ids))
+        self._park(np.setdiff1d(self._shown, vids))
+        for vid in np.setdiff1d(vids, self._shown).tolist():
+            self.sim.set_active(self.sim.vehicles[vid], True)
+        self._shown = vids
+        if self._current is not None:
+            self._period = time - self._current[0]
+        self._current = (time, vids, xy)
+        self._next = self._read()
+        self._pair = None
+        if self.interpolate and self._next is not None:
+            next_time, next_ids, next_xy, _ = self._next
+            known = np.array([self.vehicles[i].vid if i in self.vehicles else -1 for i in next_ids], dtype=np.int64)
+            both, here, there = np.intersect1d(vids, known, return_indices=True)
+            self._pair = (next_time, both, xy[here], next_xy[there])
+
+    def _park(self, vids):
+        """Move vehicles out of everyone's reach and stop their sending."""
+        self.sim.fleet.pos[vids] = PARKED
+        for vid in vids.tolist():
+            self.sim.set_active(self.sim.vehicles[vid], False)
+
+    def apply(self, fleet, tick):
+        now = tick * self.sim.dt
+        while self._next is not None and self._next[0] <= now:
+            self._promote()
+        if self._current is None:
+            return  # The trace has not started yet
+        time, vids, xy = self._current
+        if self._next is None and len(vids) and now >= time + self._period:
+            self._park(vids)  # The trace is over; its last frame has been shown for one frame interval
+            self._shown = vids = np.zeros(0, dtype=np.int64)
+            xy = xy[:0]
+            self._current = (time, vids, xy)
+        fleet.pos[vids] = xy
+        if self._pair is not None:
+            next_time, both, start, end = self._pair
+            alpha = (now - time) / (next_time - time)
+            fleet.pos[both] = start + (end - start) * alpha
+
+    def stats(self):
+        return {'trace_frames': self.frames_read, 'trace_points': self.points_read,
+                'trace_vehicles': len(self.vehicles),
+                'trace_snapped': self.snapped / self.points_read if self.points_read else 0.0}
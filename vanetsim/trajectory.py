@@ -0,0 +1,142 @@
+"""Record vehicle trajectories once and replay them without running movement.
+
+A trajectory is a directory of column chunks written as plain ``.npy``
+files: ``pos_NNNNN.npy`` holds (ticks, vehicles, 2) float32 positions,
+``target_NNNNN.npy`` the path index each vehicle is heading for and, when a
+road network was given, ``edge_NNNNN.npy`` the road edge it is on (-1 off
+road). ``meta.json`` records the timestep, vehicle count and chunk layout.
+
+Replay memory-maps one chunk at a time and copies each tick's rows into
+the fleet, so comms and detection experiments can run many times over one
+recorded mobility trace, all seeing exactly the same movement. A trace
+only fits a scenario with the same fleet; ddos and brsum share theirs.
+"""
+import json
+import os
+
+import numpy as np
+
+CHUNK_TICKS = 1024  # Ticks per chunk file
+FORMAT_VERSION = 1
+
+
+class TrajectoryRecorder:
+    """Buffers each tick's fleet state and writes it out a chunk at a time."""
+
+    def __init__(self, path, dt, network=None, chunk_ticks=CHUNK_TICKS, dtype=np.float32):
+        self.path = path
+        self.dt = dt
+        self.network = network  # Resolves road edge ids when given
+        self.chunk_ticks = chunk_ticks
+        self.dtype = np.dtype(dtype)
+        self.vehicles = None  # Fleet size, fixed by the first recorded tick
+        self.ticks = 0  # Ticks recorded
+        self.chunks = 0  # Chunk files written
+        self._pos = self._target = self._edge = None
+        self._row = 0
+        os.makedirs(path, exist_ok=True)
+
+    def record(self, fleet):
+        """Append the fleet's state after a movement step."""
+        n = fleet.size
+        if self.vehicles is None:
+            self.vehicles = n
+            self._pos = np.empty((self.chunk_ticks, n, 2), dtype=self.dtype)
+            self._target = np.empty((self.chunk_ticks, n), dtype=np.int32)
+            self._edge = np.empty((self.chunk_ticks, n), dtype=np.int32) if self.network is not None else None
+        elif n != self.vehicles:
+            raise ValueError(f"fleet changed from {self.vehicles} to {n} vehicles while recording")
+        row = self._row
+        self._pos[row] = fleet.pos[:n]
+        self._target[row] = fleet.target[:n]
+        if self._edge is not None:
+            self._edge[row] = _current_edges(self.network, fleet)
+        self._row += 1
+        self.ticks += 1
+        if self._row == self.chunk_ticks:
+            self._write_chunk()
+
+    def _write_chunk(self):
+        rows = self._row
+        np.save(os.path.join(self.path, f'pos_{self.chunks:05d}.npy'), self._pos[:rows])
+        np.save(os.path.join(self.path, f'target_{self.chunks:05d}.npy'), self._target[:rows])
+        if self._edge is not None:
+            np.save(os.path.join(self.path, f'edge_{self.chunks:05d}.npy'), self._edge[:rows])
+        self.chunks += 1
+        self._row = 0
+
+    def close(self):
+        """Write the last partial chunk and the metadata."""
+        if self._row:
+            self._write_chunk()
+        meta = {'version': FORMAT_VERSION, 'dt': self.dt, 'vehicles': self.vehicles or 0, 'ticks': self.ticks,
+                'chunk_ticks': self.chunk_ticks, 'chunks': self.chunks, 'edges': self.network is not None}
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _current_edges(network, fleet):
+    """Road edge from the node each vehicle last passed to its current target, or -1."""
+    fleet.flush_paths()
+    n = fleet.size
+    start, length, target = fleet.path_start[:n], fleet.path_len[:n], fleet.target[:n]
+    previous = fleet.path_nodes[start + (target - 1) % length]  # Paths loop back to the start
+    return network.edge_index(previous, fleet.path_nodes[start + target])
+
+
+class TrajectoryReplay:
+    """Streams a recorded trajectory back into a fleet, tick by tick."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"unsupported trajectory format in {path}")
+        self.dt = meta['dt']
+        self.vehicles = meta['vehicles']
+        self.ticks = meta['ticks']
+        self.chunk_ticks = meta['chunk_ticks']
+        self.has_edges = meta['edges']
+        self._chunk = None  # Index of the mapped chunk
+        self._pos = self._target = self._edge = None
+
+    def _load(self, chunk):
+        def column(name):
+            return np.load(os.path.join(self.path, f'{name}_{chunk:05d}.npy'), mmap_mode='r')
+        self._pos, self._target = column('pos'), column('target')
+        self._edge = column('edge') if self.has_edges else None
+        self._chunk = chunk
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_chunk=None, _pos=None, _target=None, _edge=None)  # Mapped again on the next frame
+        return state
+
+    def check(self, fleet, dt):
+        if fleet.size != self.vehicles:
+            raise ValueError(f"trajectory has {self.vehicles} vehicles, the fleet {fleet.size}")
+        if not np.isclose(dt, self.dt):
+            raise ValueError(f"trajectory was recorded with dt={self.dt}, not {dt}")
+
+    def frame(self, tick):
+        """(positions, targets, edges or None) after `tick` ticks, as read-only arrays."""
+        if not 1 <= tick <= self.ticks:
+            raise ValueError(f"trajectory covers ticks 1-{self.ticks}, not {tick}")
+        chunk, row = divmod(tick - 1, self.chunk_ticks)
+        if chunk != self._chunk:
+            self._load(chunk)
+        return self._pos[row], self._target[row], None if self._edge is None else self._edge[row]
+
+    def apply(self, fleet, tick):
+        """Move the fleet to where it was after `tick` ticks."""
+        pos, target, _ = self.frame(tick)
+        n = self.vehicles
+        fleet.pos[:n] = pos
+        fleet.target[:n] = target